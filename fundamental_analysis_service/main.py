@@ -124,14 +124,24 @@ FALLBACK_ONCHAIN_DATA = {
     }
 }
 
-def get_session():
+def _pooled_session():
     session = requests.Session()
     retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=16)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
+
+# Created with the app; FastAPI runs sync endpoints on a thread pool, so a lazy
+# first-use init could race.
+_session = _pooled_session()
+
+
+def get_session():
+    """Keep-alive session shared by the sentiment and on-chain endpoints."""
+    return _session
+
 @app.get("/sentiment/{symbol}")
 def get_sentiment(symbol: str):
     coin_symbol = symbol.split('-')[0]
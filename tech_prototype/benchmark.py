@@ -0,0 +1,201 @@
+"""
+Pipeline throughput benchmark with a synthetic, offline market-data provider.
+
+Each scenario (symbol count x worker count) runs `run_pipeline` in a fresh
+subprocess against an empty temporary data directory, so peak RSS and bytes
+written are measured per scenario. Results are printed as JSON:
+
+    python benchmark.py
+    python benchmark.py --symbols 10 1000 --workers 4 20 --latency 0.05 --error-rate 0.01 -o bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from providers import OHLCV, RateLimitError
+
+
+class SyntheticProvider:
+    """
+    Deterministic random-walk OHLCV source with optional latency and errors.
+    The same symbol and start date always produce the same candles.
+    """
+    name = 'synthetic'
+
+    def __init__(self, n_symbols=10, max_days=365, latency=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=42):
+        self.n_symbols = n_symbols
+        self.max_days = max_days
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self.seed = seed
+
+    def list_symbols(self):
+        return (f"SYN{i:05d}-USD" for i in range(self.n_symbols))
+
+    def _maybe_fail(self):
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise RateLimitError("429 Too Many Requests (synthetic)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise RuntimeError("synthetic upstream error")
+
+    def _candles(self, symbol, start, interval='1d'):
+        if interval == '1d':
+            end = pd.Timestamp.now().normalize()
+            start = max(pd.Timestamp(start), end - pd.Timedelta(days=self.max_days - 1))
+            index = pd.date_range(start, end, freq='D', name='Date')
+        else:
+            freq = interval.replace('m', 'min')
+            end = pd.Timestamp.now().floor(freq)
+            start = max(pd.Timestamp(start), end - pd.Timedelta(days=self.max_days - 1))
+            index = pd.date_range(start, end, freq=freq, name='Datetime')
+        n = len(index)
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()) ^ self.seed)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.01, n)) * close
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': rng.uniform(1e6, 1e8, n),
+        }, index=index)[OHLCV]
+
+    def history(self, symbol, start, interval='1d'):
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        return self._candles(symbol, start, interval)
+
+    def download(self, symbols, start, interval='1d'):
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        return {symbol: self._candles(symbol, start, interval) for symbol in symbols}
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run_scenario(args):
+    """Child-process entry point: one pipeline run, JSON result on stdout."""
+    # Imported here so config picks up CRYPTO_DATA_DIR set by the parent.
+    from pipeline import run_pipeline
+    from scheduler import RateLimitedScheduler
+
+    provider = SyntheticProvider(
+        n_symbols=args.n_symbols, max_days=args.days, latency=args.latency,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate
+    )
+    scheduler = RateLimitedScheduler(rate=args.rate, burst=args.rate, max_concurrency=args.n_workers,
+                                     base_backoff=0.05, max_backoff=1.0)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_pipeline(provider=provider, scheduler=scheduler, batch_size=args.batch_size,
+                             max_workers=args.n_workers, collect_latencies=True)
+
+    latencies = stats.pop('latencies')
+    queue_waits = stats.pop('queue_waits')
+    data_dir = os.environ['CRYPTO_DATA_DIR']
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+
+    result = {
+        'symbols': args.n_symbols,
+        'workers': args.n_workers,
+        'batch_size': args.batch_size,
+        'duration_s': stats['duration'],
+        'symbols_per_sec': stats['done'] / stats['duration'] if stats['duration'] else None,
+        'requests': stats['requests'],
+        'errors': stats['errors'],
+        'bytes_written': _dir_size(os.path.join(data_dir, 'store')),
+        'peak_rss_mb': rss_kb / 1024,
+        'latency_p50_ms': _percentile(latencies, 50) * 1000 if latencies else None,
+        'latency_p99_ms': _percentile(latencies, 99) * 1000 if latencies else None,
+        'queue_wait_p50_ms': _percentile(queue_waits, 50) * 1000 if queue_waits else None,
+        'queue_wait_p99_ms': _percentile(queue_waits, 99) * 1000 if queue_waits else None,
+    }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 20])
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365, help='history length per symbol')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every provider call')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of calls answered with 429')
+    parser.add_argument('--rate', type=float, default=1000.0, help='scheduler requests/sec')
+    parser.add_argument('-o', '--output', help='also write the JSON report to this file')
+    # Internal: run a single scenario in this process.
+    parser.add_argument('--scenario', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--n-symbols', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--n-workers', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for n_symbols in args.symbols:
+        for n_workers in args.workers:
+            data_dir = tempfile.mkdtemp(prefix='crypto-bench-')
+            env = dict(os.environ, CRYPTO_DATA_DIR=data_dir,
+                       CRYPTO_UNIVERSE_FILE=os.path.join(data_dir, 'no-universe.txt'))
+            cmd = [sys.executable, os.path.abspath(__file__), '--scenario',
+                   '--n-symbols', str(n_symbols), '--n-workers', str(n_workers),
+                   '--batch-size', str(args.batch_size), '--days', str(args.days),
+                   '--latency', str(args.latency), '--error-rate', str(args.error_rate),
+                   '--rate-limit-rate', str(args.rate_limit_rate), '--rate', str(args.rate)]
+            try:
+                out = subprocess.run(cmd, cwd=here, env=env, capture_output=True, text=True, check=True)
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+            except subprocess.CalledProcessError as e:
+                result = {'symbols': n_symbols, 'workers': n_workers, 'error': e.stderr.strip()[-500:]}
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+            print(f"{n_symbols} symbols / {n_workers} workers: {result}", file=sys.stderr)
+            results.append(result)
+
+    report = {
+        'benchmark': 'pipeline',
+        'params': {k: getattr(args, k) for k in ['batch_size', 'days', 'latency', 'error_rate', 'rate_limit_rate', 'rate']},
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
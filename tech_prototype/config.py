@@ -4,9 +4,32 @@ import os
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Data directory is at project root level (one level up from tech_prototype/)
 DATA_DIR = os.path.join(_SCRIPT_DIR, '..', 'data')
-DATA_DIR = os.path.normpath(DATA_DIR)
+DATA_DIR = os.path.normpath(os.environ.get('CRYPTO_DATA_DIR', DATA_DIR))
 
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
-YEARS_BACK = 10
\ No newline at end of file
+YEARS_BACK = 10
+
+# Universe of symbols for the pipeline: one symbol per line (optionally "SYMBOL,Name"),
+# '#' starts a comment. When the file does not exist the 10 default coins are used.
+UNIVERSE_FILE = os.environ.get('CRYPTO_UNIVERSE_FILE', os.path.join(DATA_DIR, 'universe.txt'))
+
+# Intraday intervals to ingest next to the daily candles, e.g. CRYPTO_INTRADAY_INTERVALS=1h,15m.
+# They are stored partitioned by month (see store.py).
+INTRADAY_INTERVALS = [i.strip() for i in os.environ.get('CRYPTO_INTRADAY_INTERVALS', '').split(',') if i.strip()]
+# How far back Yahoo serves each intraday interval.
+INTRADAY_LOOKBACK_DAYS = {'1m': 7, '2m': 59, '5m': 59, '15m': 59, '30m': 59, '60m': 729, '90m': 59, '1h': 729}
+
+# Rollups of the daily candles materialized at ingest time: store interval -> pandas resample rule.
+# The rules match CryptoMarketFacade.resample_df ("1w" -> W, "1m" -> ME).
+ROLLUP_INTERVALS = {'1wk': 'W', '1mo': 'ME'}
+
+# Pipeline ingestion
+MAX_WORKERS = 20
+# Symbols sharing a start date are fetched in multi-ticker requests of this size (1 = one request per symbol).
+BATCH_SIZE = 50
+REQUESTS_PER_SECOND = 2.0
+MAX_CONCURRENT_REQUESTS = 4
+# Upper bound on download/compaction tasks queued on the pool at once (backpressure).
+MAX_IN_FLIGHT = MAX_WORKERS * 2
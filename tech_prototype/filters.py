@@ -1,95 +1,152 @@
-import requests
-import yfinance as yf
 import os
-import json
-from datetime import datetime, timedelta
-from config import DATA_DIR, YEARS_BACK
+import requests
+from datetime import datetime, timedelta, timezone
+from config import DATA_DIR, YEARS_BACK, UNIVERSE_FILE, INTRADAY_LOOKBACK_DAYS
+from store import OHLCVStore
+from providers import YahooProvider
+from rollups import update_rollups
+
+store = OHLCVStore(DATA_DIR)
+default_provider = YahooProvider()
+
 
+DEFAULT_TICKERS = [
+    "BTC-USD", "ETH-USD", "XRP-USD", "SOL-USD", "BNB-USD",
+    "ADA-USD", "DOGE-USD", "TRX-USD", "AVAX-USD", "LTC-USD"
+]
 
-def filter_1_get_tickers():
+
+def read_universe_file(path):
     """
-    Враќа листа од 10 избрани криптовалути.
+    Чита симболи од фајл, еден по линија (опционално "СИМБОЛ,Име").
+    Генератор, па и фајл со илјадници симболи не се чува цел во меморија.
     """
-    print("--> Филтер 1: Вчитување на избраните 10 криптовалути...")
-    target_tickers = [
-        "BTC-USD", "ETH-USD", "XRP-USD", "SOL-USD", "BNB-USD",
-        "ADA-USD", "DOGE-USD", "TRX-USD", "AVAX-USD", "LTC-USD"
-    ]
-    print(f"    Вкупно {len(target_tickers)} валути за обработка.")
-    return target_tickers
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line.split(',', 1)[0].strip()
 
 
-def filter_2_check_date(symbol):
+def filter_1_get_tickers(provider=None):
     """
-    Проверува дали имаме податоци и до кој датум.
+    Враќа итератор од симболи за обработка: од UNIVERSE_FILE ако постои,
+    од листата на провајдерот ако ја нуди, инаку 10 избрани криптовалути.
     """
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+    if os.path.exists(UNIVERSE_FILE):
+        print(f"--> Филтер 1: Вчитување на симболи од {UNIVERSE_FILE}...")
+        return read_universe_file(UNIVERSE_FILE)
+
+    if provider is not None and hasattr(provider, 'list_symbols'):
+        print(f"--> Филтер 1: Вчитување на симболи од провајдерот '{provider.name}'...")
+        return iter(provider.list_symbols())
 
+    print("--> Филтер 1: Вчитување на избраните 10 криптовалути...")
+    print(f"    Вкупно {len(DEFAULT_TICKERS)} валути за обработка.")
+    return iter(DEFAULT_TICKERS)
+
+
+def filter_2_check_date(symbol, interval="1d"):
+    """
+    Проверува дали имаме податоци и до кој датум (преку манифестот, без читање на историјата).
+    За intraday интервали почнува од денот на последната свеќа, бидејќи денот не е завршен.
+    """
     start_date = None
     today = datetime.now().date()
-    ten_years_ago = today - timedelta(days=365 * YEARS_BACK)
+    intraday = interval != "1d"
+    if intraday:
+        oldest = today - timedelta(days=INTRADAY_LOOKBACK_DAYS.get(interval, 59))
+    else:
+        oldest = today - timedelta(days=365 * YEARS_BACK)
 
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                if data:
-                    last_entry = data[-1]
-                    last_date_str = last_entry.get('Date')
-                    if last_date_str:
-                        last_date_obj = datetime.strptime(last_date_str, '%Y-%m-%d').date()
-                        start_date = last_date_obj + timedelta(days=1)
-        except:
-            start_date = None
-    if start_date is None:
-        start_date = ten_years_ago
-
-    if start_date >= today:
+    try:
+        entry = store.manifest.get(symbol, interval)
+        last_ts = entry['last_ts'] if entry else None
+        if entry is None:
+            # Симбол кој сè уште не е во манифестот (пр. стар JSON фајл) се мигрира при првото читање.
+            header = store.header(symbol, interval)
+            last_ts = header.get('last') if header else None
+        if last_ts is not None:
+            last_date_obj = datetime.fromtimestamp(last_ts, tz=timezone.utc).date()
+            start_date = last_date_obj if intraday else last_date_obj + timedelta(days=1)
+    except:
+        start_date = None
+    if start_date is None or start_date < oldest:
+        start_date = oldest
+
+    if start_date >= today and not intraday:
         return (symbol, None)
 
     return (symbol, start_date.strftime('%Y-%m-%d'))
 
 
-def filter_3_fetch_data(data_tuple):
+def _save_candles(symbol, df, interval="1d"):
+    df = df.reset_index()
+    if 'Datetime' in df.columns:
+        df = df.rename(columns={'Datetime': 'Date'})
+    if interval == "1d":
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+
+    df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+    store.append(symbol, df, interval)
+    if interval == "1d":
+        update_rollups(store, symbol)
+    return len(df)
+
+
+def filter_3_fetch_data(data_tuple, provider=None, scheduler=None, interval="1d"):
     """
-    Ги пополнува податоците што недостасуваат и зачувува во JSON фајл.
+    Ги пополнува податоците што недостасуваат и ги зачувува во колонскиот store.
     """
     symbol, start_date_str = data_tuple
 
     if start_date_str is None:
         return f"SKIP: {symbol} е веќе ажуриран."
 
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+    provider = provider or default_provider
 
     try:
-        ticker = yf.Ticker(symbol)
-
-        df = ticker.history(start=start_date_str, interval="1d")
+        if scheduler is not None:
+            df = scheduler.call(provider.history, symbol, start_date_str, interval)
+        else:
+            df = provider.history(symbol, start_date_str, interval)
 
         if df.empty:
             return f"NO DATA: Нема податоци за {symbol}."
 
-        df.reset_index(inplace=True)
-        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
-
-        df = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-
-        new_data = df.to_dict('records')
+        added = _save_candles(symbol, df, interval)
 
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except:
-                    existing_data = []
+        return f"SUCCESS: {symbol} [{interval}] (+{added} свеќи)."
 
-        combined_data = existing_data + new_data
+    except Exception as e:
+        return f"ERROR: Проблем со {symbol}: {str(e)}"
 
-        with open(file_path, 'w') as f:
-            json.dump(combined_data, f, indent=4)
 
-        return f"SUCCESS: {symbol} (+{len(new_data)} денови)."
+def filter_3_fetch_batch(start_date_str, symbols, provider=None, scheduler=None, interval="1d"):
+    """
+    Исто како filter_3_fetch_data, но за група симболи со ист почетен датум
+    во едно multi-ticker барање. Враќа листа од (симбол, резултат).
+    """
+    provider = provider or default_provider
 
+    try:
+        if scheduler is not None:
+            frames = scheduler.call(provider.download, symbols, start_date_str, interval)
+        else:
+            frames = provider.download(symbols, start_date_str, interval)
     except Exception as e:
-        return f"ERROR: Проблем со {symbol}: {str(e)}"
\ No newline at end of file
+        return [(symbol, f"ERROR: Проблем со {symbol}: {str(e)}") for symbol in symbols]
+
+    results = []
+    for symbol in symbols:
+        df = frames.get(symbol)
+        if df is None or df.empty:
+            results.append((symbol, f"NO DATA: Нема податоци за {symbol}."))
+            continue
+        try:
+            added = _save_candles(symbol, df, interval)
+            results.append((symbol, f"SUCCESS: {symbol} [{interval}] (+{added} свеќи)."))
+        except Exception as e:
+            results.append((symbol, f"ERROR: Проблем со {symbol}: {str(e)}"))
+    return results
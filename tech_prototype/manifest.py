@@ -0,0 +1,84 @@
+"""
+Per-symbol metadata manifest for the columnar store.
+
+A single SQLite table holding first/last date, row count, checksum and
+store generation for every series, so freshness checks, listing and search
+are index lookups instead of opening each symbol's files.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    symbol      TEXT NOT NULL,
+    interval    TEXT NOT NULL,
+    first_ts    INTEGER,
+    last_ts     INTEGER,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    checksum    INTEGER,
+    generation  INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+)
+"""
+
+FIELDS = ['symbol', 'interval', 'first_ts', 'last_ts', 'rows', 'checksum', 'generation', 'updated_at']
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe to use from the
+        # pipeline's worker threads and from the Django process at once.
+        # `with conn` only commits or rolls back; the handle is closed here.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def update(self, header):
+        """Upsert the manifest row for the series described by a store header."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (header['symbol'], header['interval'], header.get('first'), header.get('last'),
+                 header.get('rows', 0), header.get('checksum'), header['generation'], time.time())
+            )
+
+    def get(self, symbol, interval='1d'):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+            ).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def entries(self, interval='1d'):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM series WHERE interval = ? ORDER BY symbol", (interval,)
+            ).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    def symbols(self, query=None, interval='1d'):
+        """Symbols with data for `interval`, optionally filtered by a case-insensitive substring."""
+        sql = "SELECT symbol FROM series WHERE interval = ? AND rows > 0"
+        params = [interval]
+        if query:
+            sql += " AND symbol LIKE ? ESCAPE '\\'"
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(sql + " ORDER BY symbol", params)]
+
+    def count(self, interval='1d'):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM series WHERE interval = ?", (interval,)).fetchone()[0]
@@ -1,48 +1,183 @@
 import time
 import concurrent.futures
-from filters import filter_1_get_tickers, filter_2_check_date, filter_3_fetch_data
-
-
-def run_pipeline():
+from config import (
+    MAX_WORKERS, BATCH_SIZE, REQUESTS_PER_SECOND, MAX_CONCURRENT_REQUESTS, MAX_IN_FLIGHT, INTRADAY_INTERVALS
+)
+from filters import (
+    filter_1_get_tickers, filter_2_check_date, filter_3_fetch_data, filter_3_fetch_batch,
+    default_provider, store
+)
+from scheduler import RateLimitedScheduler
+from rollups import backfill_rollups
+from snapshot import MarketSnapshot
+
+snapshot = MarketSnapshot(store)
+
+
+def _timed(fn, *args):
+    """Run `fn` on a worker; returns (result, started, finished) so the caller can split queue wait from work."""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+def run_pipeline(provider=None, scheduler=None, symbols=None, batch_size=BATCH_SIZE,
+                 max_workers=MAX_WORKERS, max_in_flight=MAX_IN_FLIGHT, collect_latencies=False,
+                 intervals=None, progress=None):
+    """
+    Symbols stream from filter 1 through filter 2 into download tasks on a
+    bounded queue: at most `max_in_flight` tasks are queued on the pool and
+    only partially filled batches are held back, so memory stays flat no
+    matter how large the universe is. Returns a dict with run counters.
+    With `collect_latencies` it also holds `latencies` (seconds of provider
+    call and store write per symbol, a batch's time split over its symbols)
+    and `queue_waits` (seconds each task waited for a worker).
+    Daily candles are always refreshed; `intervals` (default
+    INTRADAY_INTERVALS) adds intraday series. `progress`, when given, is
+    called with the counters after every finished download task.
+    """
     start_time = time.time()
 
+    provider = provider or default_provider
+    scheduler = scheduler or RateLimitedScheduler(
+        rate=REQUESTS_PER_SECOND, max_concurrency=MAX_CONCURRENT_REQUESTS
+    )
+
     print("=========================================")
     print("STARTING CRYPTO DATA PIPELINE")
     print("=========================================")
 
-    symbols = filter_1_get_tickers()
-
-    if not symbols:
+    if symbols is None:
+        symbols = filter_1_get_tickers(provider)
+    if intervals is None:
+        intervals = INTRADAY_INTERVALS
+
+    stats = {'symbols': 0, 'to_update': 0, 'done': 0, 'errors': 0, 'requests': 0, 'duration': 0.0}
+    if collect_latencies:
+        stats['latencies'] = []
+        stats['queue_waits'] = []
+
+    print(f"\nЗапочнува обработка со {max_workers} нитки...")
+
+    # Symbols with new daily candles, whose snapshot rows are refreshed at the end.
+    updated = set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        # Series due for compaction, submitted under the same in-flight bound as downloads.
+        to_compact = {}
+
+        def handle(future):
+            chunk, submitted_at = in_flight.pop(future)
+            if chunk is None:
+                # Background compaction task.
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Грешка при компакција: {e}")
+                return
+
+            interval, chunk = chunk
+            result, started, finished = future.result()
+            results = result if isinstance(result, list) else [(chunk[0], result)]
+            if collect_latencies:
+                stats['queue_waits'].append(started - submitted_at)
+                latency = (finished - started) / max(len(results), 1)
+            for symbol, message in results:
+                stats['done'] += 1
+                if collect_latencies:
+                    stats['latencies'].append(latency)
+                if message.startswith('ERROR'):
+                    stats['errors'] += 1
+                elif message.startswith('SUCCESS') and interval == "1d":
+                    updated.add(symbol)
+                # Journal segments are folded back into the base files on the same
+                # pool, in the background of the remaining downloads.
+                if store.needs_compaction(symbol, interval):
+                    to_compact[(symbol, interval)] = None
+                if stats['done'] % 50 == 0:
+                    print(f"[{stats['done']}/{stats['to_update']}] {message}")
+            if progress is not None:
+                progress(stats)
+
+        def wait_for_slot():
+            # Backpressure: wait for a slot before queueing more work.
+            while len(in_flight) >= max_in_flight:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    handle(future)
+
+        def submit_compactions():
+            while to_compact:
+                wait_for_slot()
+                if to_compact:
+                    symbol, interval = next(iter(to_compact))
+                    del to_compact[(symbol, interval)]
+                    in_flight[executor.submit(store.compact, symbol, interval)] = (None, time.time())
+
+        def submit(fn, *args, chunk):
+            submit_compactions()
+            wait_for_slot()
+            in_flight[executor.submit(_timed, fn, *args)] = (chunk, time.time())
+
+        # Symbols waiting for their batch to fill, grouped by (start date, interval).
+        pending = {}
+
+        def flush(key):
+            start_date, interval = key
+            chunk = pending.pop(key)
+            if batch_size > 1:
+                submit(filter_3_fetch_batch, start_date, chunk, provider, scheduler, interval,
+                       chunk=(interval, chunk))
+            else:
+                submit(filter_3_fetch_data, (chunk[0], start_date), provider, scheduler, interval,
+                       chunk=(interval, chunk))
+
+        for symbol in symbols:
+            stats['symbols'] += 1
+            # The web app only reads rollups; series that predate them are rolled up here.
+            backfill_rollups(store, symbol)
+            for interval in ["1d"] + intervals:
+                symbol, start_date = filter_2_check_date(symbol, interval)
+                if start_date is None:
+                    continue
+
+                stats['to_update'] += 1
+                key = (start_date, interval)
+                pending.setdefault(key, []).append(symbol)
+                if len(pending[key]) >= batch_size:
+                    flush(key)
+                elif sum(len(chunk) for chunk in pending.values()) >= batch_size * 4:
+                    # Many distinct start dates: ship the largest partial batch early.
+                    flush(max(pending, key=lambda k: len(pending[k])))
+
+        for start_date in list(pending):
+            flush(start_date)
+
+        while in_flight or to_compact:
+            submit_compactions()
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                handle(future)
+
+    if stats['symbols'] == 0:
         print("Грешка: Не се пронајдени симболи.")
-        return
-
-    MAX_WORKERS = 20
-
-    print(f"\nЗапочнува обработка со {MAX_WORKERS} нитки...")
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        filter_2_results = list(executor.map(filter_2_check_date, symbols))
-
-        tasks_to_download = [item for item in filter_2_results if item[1] is not None]
-
-        print(f"Потребно ажурирање за {len(tasks_to_download)} од {len(symbols)} валути.")
-
-        futures = [executor.submit(filter_3_fetch_data, item) for item in tasks_to_download]
 
-        counter = 0
-        for future in concurrent.futures.as_completed(futures):
-            counter += 1
-            result = future.result()
-            if counter % 50 == 0:
-                print(f"[{counter}/{len(tasks_to_download)}] {result}")
+    try:
+        snapshot.update(updated)
+    except Exception as e:
+        print(f"Грешка при ажурирање на snapshot: {e}")
 
-    end_time = time.time()
-    duration = end_time - start_time
+    stats['requests'] = scheduler.stats['requests']
+    stats['duration'] = time.time() - start_time
 
     print("\n=========================================")
-    print(f"Вкупно време на извршување: {duration:.2f} секунди")  #
+    print(f"Ажурирани {stats['to_update']} серии (валута и интервал) за {stats['symbols']} валути (грешки: {stats['errors']}).")
+    print(f"Барања до изворот: {scheduler.stats['requests']} (ограничени: {scheduler.stats['throttled']})")
+    print(f"Вкупно време на извршување: {stats['duration']:.2f} секунди")  #
     print("=========================================")
+    return stats
 
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    run_pipeline()
@@ -0,0 +1,103 @@
+"""
+Market-data providers for the pipeline.
+
+A provider exposes `history(symbol, start, interval)` for a single symbol and
+`download(symbols, start, interval)` for a chunk of symbols sharing the same
+start date. Both return DataFrames indexed by date with Open/High/Low/Close/
+Volume columns. Providers signal throttling by raising RateLimitError so the
+scheduler can back off. The pipeline takes any object with this shape, which
+lets it run against a local fake instead of Yahoo.
+"""
+import logging
+import threading
+import pandas as pd
+import yfinance as yf
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class RateLimitError(Exception):
+    """The upstream data source is throttling us."""
+
+
+def _is_rate_limit(exc):
+    rate_limit_type = getattr(getattr(yf, 'exceptions', None), 'YFRateLimitError', None)
+    if rate_limit_type is not None and isinstance(exc, rate_limit_type):
+        return True
+    text = str(exc).lower()
+    return '429' in text or 'too many requests' in text or 'rate limit' in text
+
+
+class _ErrorCapture(logging.Handler):
+    """Collects the yfinance log messages emitted by one thread."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.messages = []
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(record.getMessage())
+
+
+def _download_errors(symbols, captured):
+    """
+    Per-ticker errors of the last yf.download call. yfinance catches them and
+    only logs them (1.x) or records them in yf.shared._ERRORS (0.2.x), so a
+    throttled chunk comes back as empty frames instead of an exception.
+    """
+    shared = getattr(yf, 'shared', None)
+    recorded = dict(getattr(shared, '_ERRORS', None) or {})
+    recorded.update(getattr(shared, '_TRACEBACKS', None) or {})
+    errors = [str(err) for symbol, err in recorded.items() if symbol in symbols]
+    return errors + captured.messages
+
+
+class YahooProvider:
+    name = 'yahoo'
+
+    def history(self, symbol, start, interval='1d'):
+        try:
+            return yf.Ticker(symbol).history(start=start, interval=interval)
+        except Exception as e:
+            if _is_rate_limit(e):
+                raise RateLimitError(str(e)) from e
+            raise
+
+    def download(self, symbols, start, interval='1d'):
+        """One multi-ticker request; returns {symbol: DataFrame} for symbols that have rows."""
+        symbols = list(symbols)
+        captured = _ErrorCapture()
+        logger = logging.getLogger('yfinance')
+        logger.addHandler(captured)
+        try:
+            df = yf.download(
+                symbols, start=start, interval=interval,
+                group_by='ticker', auto_adjust=True, threads=False, progress=False
+            )
+        except Exception as e:
+            if _is_rate_limit(e):
+                raise RateLimitError(str(e)) from e
+            raise
+        finally:
+            logger.removeHandler(captured)
+
+        throttled = [err for err in _download_errors(symbols, captured) if _is_rate_limit(err)]
+        if throttled:
+            # Part of the chunk may have come through; the scheduler retries all of it after backing off.
+            raise RateLimitError(throttled[0])
+
+        result = {}
+        if df is None or df.empty:
+            return result
+        if not isinstance(df.columns, pd.MultiIndex):
+            # Older yfinance returns flat columns for a single ticker.
+            frames = {symbols[0]: df} if len(symbols) == 1 else {}
+        else:
+            frames = {symbol: df[symbol] for symbol in symbols if symbol in df.columns.get_level_values(0)}
+        for symbol, symbol_df in frames.items():
+            symbol_df = symbol_df[OHLCV].dropna(how='all')
+            if not symbol_df.empty:
+                result[symbol] = symbol_df
+        return result
@@ -0,0 +1,82 @@
+"""
+Materialized multi-timeframe OHLCV rollups of the daily series.
+
+Each rollup (e.g. "1wk", "1mo") is an ordinary store series holding only
+*closed* buckets, labelled like `resample_df` labels them (bucket end). It
+is append-only: after new daily candles arrive, only the days since the
+last closed bucket are resampled and any newly closed buckets are appended.
+The still-open bucket is computed at read time from those few daily rows,
+so reads are always exact even if the pipeline has not caught up.
+"""
+import pandas as pd
+from config import ROLLUP_INTERVALS
+
+AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum"
+}
+
+
+def resample(df, rule):
+    """Bucket daily candles with the same rules as CryptoMarketFacade.resample_df."""
+    return df.resample(rule, on="Date").agg(AGGREGATION).dropna().reset_index()
+
+
+def _tail_since_rollup(store, symbol, interval):
+    """(rollup header, daily candles after its last closed bucket)."""
+    header = store.header(symbol, interval)
+    start = None
+    if header and header.get('last') is not None:
+        start = header['last'] + 1
+    return header, store.read(symbol, start=start)
+
+
+def update_rollup(store, symbol, interval):
+    """Append the buckets closed since the last update; returns how many were added."""
+    rule = ROLLUP_INTERVALS[interval]
+    _, daily = _tail_since_rollup(store, symbol, interval)
+    if daily is None or daily.empty:
+        return 0
+
+    buckets = resample(daily, rule)
+    # A bucket is closed once the daily series has moved past its label.
+    closed = buckets[buckets['Date'] < daily['Date'].iloc[-1]]
+    if closed.empty:
+        return 0
+    store.append(symbol, closed, interval)
+    return len(closed)
+
+
+def update_rollups(store, symbol):
+    for interval in ROLLUP_INTERVALS:
+        update_rollup(store, symbol, interval)
+
+
+def backfill_rollups(store, symbol):
+    """Materialize the rollups of a daily series ingested before they existed."""
+    if not store.exists(symbol):
+        return
+    for interval in ROLLUP_INTERVALS:
+        if not store.exists(symbol, interval):
+            update_rollup(store, symbol, interval)
+
+
+def read_rollup(store, symbol, interval):
+    """Closed buckets from the store plus the open bucket(s) from the daily tail."""
+    rule = ROLLUP_INTERVALS[interval]
+    header, daily = _tail_since_rollup(store, symbol, interval)
+    closed = store.read(symbol, interval=interval) if header else None
+    open_buckets = resample(daily, rule) if daily is not None and not daily.empty else None
+    if open_buckets is not None and closed is not None and not closed.empty:
+        # The pipeline may have closed a bucket between the two reads.
+        open_buckets = open_buckets[open_buckets['Date'] > closed['Date'].iloc[-1]]
+
+    parts = [part for part in (closed, open_buckets) if part is not None and not part.empty]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,82 @@
+"""
+Rate-limit-aware request scheduler for the pipeline.
+
+A token bucket caps the request rate, a semaphore caps how many requests are
+in flight, and a RateLimitError from the provider pauses the whole bucket
+with exponential backoff before the call is retried. Clock and sleep are
+injectable so the scheduler can be exercised without real waiting.
+"""
+import threading
+import time
+from providers import RateLimitError
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.paused_until = 0.0
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` and drain the bucket (used on throttling)."""
+        with self._lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated_at = self.paused_until
+
+
+class RateLimitedScheduler:
+    def __init__(self, rate=2.0, burst=4, max_concurrency=4, max_retries=5,
+                 base_backoff=2.0, max_backoff=60.0, clock=time.monotonic, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'throttled': 0}
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn` under the rate limit, retrying with backoff when it raises RateLimitError."""
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            with self._slots:
+                with self._stats_lock:
+                    self.stats['requests'] += 1
+                try:
+                    return fn(*args, **kwargs)
+                except RateLimitError:
+                    with self._stats_lock:
+                        self.stats['throttled'] += 1
+                    if attempt >= self.max_retries:
+                        raise
+            delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+            self.bucket.pause(delay)
+            attempt += 1
@@ -0,0 +1,103 @@
+"""
+Compact market snapshot: one row per symbol with the latest daily candle.
+
+    data/store/snapshot.json
+    {"updated_at": ..., "coins": {"BTC-USD": {"date": ..., "open": ..., "close": ...,
+                                             "change": ..., "volume": ..., "updated_at": ...}}}
+
+The pipeline refreshes the rows of the symbols it touched after every run
+and rewrites the file atomically. The index page and search read only this
+file (parsed once per change of its mtime), so their cost no longer depends
+on history length.
+"""
+import os
+import json
+import time
+import threading
+from store import atomic_write_json
+
+SNAPSHOT_FILE = 'snapshot.json'
+
+# One update lock per snapshot file for the whole process (the pipeline and the
+# facade each hold a MarketSnapshot over the same store).
+_update_locks = {}
+_update_locks_guard = threading.Lock()
+
+
+def _update_lock(path):
+    with _update_locks_guard:
+        return _update_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def snapshot_row(last):
+    """Build a snapshot row from an OHLCVStore.last_row() dict."""
+    open_p = last['Open']
+    close_p = last['Close']
+    return {
+        'date': last['Date'],
+        'open': open_p,
+        'close': close_p,
+        'change': ((close_p - open_p) / open_p * 100) if open_p else 0.0,
+        'volume': last['Volume'],
+        'updated_at': time.time(),
+    }
+
+
+class MarketSnapshot:
+    def __init__(self, store):
+        self.store = store
+        self.path = os.path.join(store.root, SNAPSHOT_FILE)
+        self._loaded = (None, {})  # (mtime_ns, coins)
+        self._lock = _update_lock(self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def coins(self):
+        """Return {symbol: row}, re-parsing the file only when it has changed on disk."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._loaded[0] == mtime:
+            return self._loaded[1]
+        try:
+            with open(self.path, 'r') as f:
+                coins = json.load(f).get('coins', {})
+        except (OSError, ValueError):
+            return self._loaded[1]
+        self._loaded = (mtime, coins)
+        return coins
+
+    def get(self, symbol):
+        return self.coins().get(symbol)
+
+    def update(self, symbols=None):
+        """
+        Recompute the rows of `symbols` (all symbols in the manifest when None)
+        from the store and atomically rewrite the snapshot.
+        """
+        with self._lock:
+            if symbols is None or not self.exists():
+                symbols = self.store.symbols()
+                coins = {}
+            else:
+                coins = dict(self.coins())
+
+            for symbol in symbols:
+                last = self.store.last_row(symbol)
+                if last is None:
+                    coins.pop(symbol, None)
+                else:
+                    coins[symbol] = snapshot_row(last)
+
+            atomic_write_json(self.path, {'updated_at': time.time(), 'coins': coins})
+            return len(coins)
+
+
+if __name__ == "__main__":
+    from config import DATA_DIR
+    from store import OHLCVStore
+
+    count = MarketSnapshot(OHLCVStore(DATA_DIR)).update()
+    print(f"Snapshot rebuilt with {count} symbols.")
@@ -0,0 +1,505 @@
+"""
+Columnar OHLCV store.
+
+Every symbol/interval pair lives in its own directory:
+
+    data/store/<SYMBOL>/<interval>/header.json
+    data/store/<SYMBOL>/<interval>/base.<generation>/<Column>.npy
+    data/store/<SYMBOL>/<interval>/seg.<generation>.npy
+
+Intraday intervals (1h, 15m, 5m, ...) hold hundreds of times more rows, so
+they are partitioned by month; every partition is a series of its own and
+the interval directory keeps an aggregate header listing the partitions:
+
+    data/store/<SYMBOL>/<interval>/header.json
+    data/store/<SYMBOL>/<interval>/<YYYY-MM>/header.json, base.*, seg.*
+
+Each column is a flat .npy array (Date as int64 epoch seconds, prices and
+volume as float64). Readers memory-map the columns and binary-search the
+Date array, so a 30-day slice touches a few kilobytes instead of parsing the
+whole history. Incremental refreshes only write a small journal segment
+(one structured .npy with the new rows); `compact()` later folds segments
+back into a new base generation. The small header.json lists the current
+base and segments and is always replaced last (temp file + rename), so
+readers never see a half-written series.
+"""
+import os
+import json
+import shutil
+import threading
+import zlib
+import numpy as np
+import pandas as pd
+from manifest import Manifest
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_INTERVAL = '1d'
+FORMAT_VERSION = 1
+# Journal segments are folded into the base columns once this many pile up.
+COMPACT_AFTER_SEGMENTS = 16
+# Intervals stored in monthly partitions.
+INTRADAY_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h']
+SEGMENT_DTYPE = np.dtype([('Date', np.int64)] + [(col, np.float64) for col in COLUMNS])
+
+# Writer locks per (absolute store root, symbol), shared by every OHLCVStore of the
+# process: the pipeline and the facade each open their own instance over the same root.
+_writer_locks = {}
+_writer_locks_guard = threading.Lock()
+
+
+def to_epoch(value):
+    """Convert a date-like value (str, datetime, Timestamp, epoch int) to epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return int(ts.timestamp())
+
+
+def atomic_write_json(path, obj):
+    """Write JSON next to `path` and rename it into place."""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def frame_to_columns(df):
+    """
+    Normalise a candle DataFrame (Date column or DatetimeIndex) into sorted
+    numpy columns: Date as int64 epoch seconds, the rest as float64.
+    """
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+        if 'Datetime' in df.columns:
+            df = df.rename(columns={'Datetime': 'Date'})
+
+    dates = pd.to_datetime(df['Date'])
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_localize(None)
+
+    columns = {'Date': dates.values.astype('datetime64[s]').astype(np.int64)}
+    for col in COLUMNS:
+        columns[col] = df[col].to_numpy(dtype=np.float64)
+
+    order = np.argsort(columns['Date'], kind='stable')
+    if not np.all(order == np.arange(len(order))):
+        columns = {k: v[order] for k, v in columns.items()}
+    return columns
+
+
+def is_partitioned(interval):
+    return interval in INTRADAY_INTERVALS
+
+
+def partition_key(epoch_seconds):
+    """Month partition name ('YYYY-MM') for an epoch timestamp."""
+    return str(np.datetime64(int(epoch_seconds), 's').astype('datetime64[M]'))
+
+
+def rows_checksum(columns, previous=0):
+    """
+    CRC32 over the rows in segment layout. CRC32 streams, so chaining the
+    checksum of appended blocks equals the checksum of the compacted series.
+    """
+    rows = np.empty(len(columns['Date']), dtype=SEGMENT_DTYPE)
+    for col in ['Date'] + COLUMNS:
+        rows[col] = columns[col]
+    return zlib.crc32(rows.tobytes(), previous)
+
+
+def columns_to_frame(columns):
+    df = pd.DataFrame({col: np.asarray(columns[col]) for col in COLUMNS})
+    df.insert(0, 'Date', pd.to_datetime(np.asarray(columns['Date']), unit='s'))
+    return df
+
+
+class OHLCVStore:
+    """
+    Read/write API over the columnar store, shared by the pipeline, the
+    facade and the LSTM predictor.
+
+    Legacy `data/<SYMBOL>.json` files are migrated on first access, so a
+    fresh checkout works without running the migrator by hand. Every write
+    also updates the SQLite manifest (`store/manifest.sqlite3`).
+    """
+
+    def __init__(self, data_dir, root=None):
+        self.data_dir = data_dir
+        self.root = root or os.path.join(data_dir, 'store')
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest = Manifest(os.path.join(self.root, 'manifest.sqlite3'))
+
+    # ---------- paths ----------
+
+    def _series_dir(self, symbol, interval=DEFAULT_INTERVAL):
+        return os.path.join(self.root, symbol, interval)
+
+    def _header_path(self, symbol, interval=DEFAULT_INTERVAL):
+        return os.path.join(self._series_dir(symbol, interval), 'header.json')
+
+    def _legacy_json_path(self, symbol):
+        return os.path.join(self.data_dir, f"{symbol}.json")
+
+    def _lock(self, symbol):
+        key = (os.path.abspath(self.root), symbol)
+        with _writer_locks_guard:
+            if key not in _writer_locks:
+                # Re-entrant: partitioned appends write several partitions under one lock.
+                _writer_locks[key] = threading.RLock()
+            return _writer_locks[key]
+
+    # ---------- header / listing ----------
+
+    def header(self, symbol, interval=DEFAULT_INTERVAL):
+        """Return the parsed header of a series, or None if it does not exist."""
+        path = self._header_path(symbol, interval)
+        if not os.path.exists(path):
+            if interval == DEFAULT_INTERVAL and os.path.exists(self._legacy_json_path(symbol)):
+                self.migrate_json(symbol)
+            if not os.path.exists(path):
+                return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def exists(self, symbol, interval=DEFAULT_INTERVAL):
+        return self.header(symbol, interval) is not None
+
+    def symbols(self, query=None):
+        """Symbols with daily data, optionally filtered by substring, from the manifest."""
+        if self.manifest.count() == 0:
+            self.rebuild_manifest()
+        return self.manifest.symbols(query)
+
+    def rebuild_manifest(self):
+        """Re-register every series on disk and migrate any legacy JSON files."""
+        for symbol in os.listdir(self.root):
+            symbol_dir = os.path.join(self.root, symbol)
+            if not os.path.isdir(symbol_dir):
+                continue
+            for interval in os.listdir(symbol_dir):
+                header = self._read_header_file(symbol, interval)
+                if header is None:
+                    continue
+                if header.get('checksum') is None:
+                    columns = self.read_arrays(symbol, interval=interval)
+                    header['checksum'] = rows_checksum(columns)
+                self.manifest.update(header)
+        self.migrate_all()
+
+    # ---------- reads ----------
+
+    def _open_columns(self, symbol, header, interval):
+        base_dir = os.path.join(self._series_dir(symbol, interval), f"base.{header.get('base', header['generation'])}")
+        return {
+            col: np.load(os.path.join(base_dir, f"{col}.npy"), mmap_mode='r')
+            for col in ['Date'] + COLUMNS
+        }
+
+    def _open_segments(self, symbol, header, interval):
+        series_dir = self._series_dir(symbol, interval)
+        return [
+            np.load(os.path.join(series_dir, name), mmap_mode='r')
+            for name in header.get('segments', [])
+        ]
+
+    def read_arrays(self, symbol, start=None, end=None, interval=DEFAULT_INTERVAL):
+        """
+        Return a dict of numpy arrays for rows with start <= Date <= end.
+        Only the requested slice is copied out of the memory-mapped base
+        columns; appended journal segments are merged on top.
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if is_partitioned(interval):
+            return self._read_partitioned(symbol, start_ts, end_ts, interval)
+        for _ in range(3):
+            header = self.header(symbol, interval)
+            if header is None:
+                return None
+            try:
+                mapped = self._open_columns(symbol, header, interval)
+                segments = self._open_segments(symbol, header, interval)
+            except FileNotFoundError:
+                # A writer swapped generations between our header read and open; retry.
+                continue
+
+            parts = []
+            for dates, source in [(mapped['Date'], mapped)] + [(seg['Date'], seg) for seg in segments]:
+                lo = 0 if start_ts is None else int(np.searchsorted(dates, start_ts, side='left'))
+                hi = len(dates) if end_ts is None else int(np.searchsorted(dates, end_ts, side='right'))
+                if hi > lo or not parts:
+                    parts.append({col: source[col][lo:hi] for col in ['Date'] + COLUMNS})
+
+            if len(parts) == 1:
+                return {col: np.array(arr) for col, arr in parts[0].items()}
+            return {col: np.concatenate([p[col] for p in parts]) for col in ['Date'] + COLUMNS}
+        return None
+
+    def _read_partitioned(self, symbol, start_ts, end_ts, interval):
+        """Read a range of an intraday series, opening only the monthly partitions it overlaps."""
+        header = self.header(symbol, interval)
+        if header is None:
+            return None
+        first_key = partition_key(start_ts) if start_ts is not None else None
+        last_key = partition_key(end_ts) if end_ts is not None else None
+
+        parts = []
+        for key in header.get('partitions', []):
+            if (first_key and key < first_key) or (last_key and key > last_key):
+                continue
+            columns = self.read_arrays(symbol, start_ts, end_ts, f"{interval}/{key}")
+            if columns is not None and len(columns['Date']):
+                parts.append(columns)
+
+        if not parts:
+            return {'Date': np.empty(0, dtype=np.int64), **{col: np.empty(0) for col in COLUMNS}}
+        return {col: np.concatenate([p[col] for p in parts]) for col in ['Date'] + COLUMNS}
+
+    def read(self, symbol, start=None, end=None, interval=DEFAULT_INTERVAL):
+        """Return a typed DataFrame (Date, Open, High, Low, Close, Volume) or None."""
+        columns = self.read_arrays(symbol, start, end, interval)
+        if columns is None:
+            return None
+        return columns_to_frame(columns)
+
+    def last_row(self, symbol, interval=DEFAULT_INTERVAL):
+        """Return the last candle as a dict, reading only the final element of each column."""
+        for _ in range(3):
+            header = self.header(symbol, interval)
+            if header is None or header.get('rows', 0) == 0:
+                return None
+            if is_partitioned(interval):
+                return self.last_row(symbol, f"{interval}/{header['partitions'][-1]}")
+            try:
+                segments = self._open_segments(symbol, header, interval)
+                source = segments[-1] if segments else self._open_columns(symbol, header, interval)
+            except FileNotFoundError:
+                continue
+            row = {col: float(source[col][-1]) for col in COLUMNS}
+            row['Date'] = int(source['Date'][-1])
+            return row
+        return None
+
+    # ---------- writes ----------
+
+    def _read_header_file(self, symbol, interval):
+        header_path = self._header_path(symbol, interval)
+        if not os.path.exists(header_path):
+            return None
+        with open(header_path, 'r') as f:
+            return json.load(f)
+
+    def _write_series(self, symbol, columns, interval=DEFAULT_INTERVAL):
+        """Write a fresh base generation and drop the previous base and its segments."""
+        series_dir = self._series_dir(symbol, interval)
+        os.makedirs(series_dir, exist_ok=True)
+
+        old_header = self._read_header_file(symbol, interval)
+        generation = (old_header['generation'] + 1) if old_header else 1
+        base_dir = os.path.join(series_dir, f"base.{generation}")
+        tmp_dir = f"{base_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, 'Date.npy'), np.ascontiguousarray(columns['Date'], dtype=np.int64))
+        for col in COLUMNS:
+            np.save(os.path.join(tmp_dir, f"{col}.npy"), np.ascontiguousarray(columns[col], dtype=np.float64))
+        os.replace(tmp_dir, base_dir)
+
+        rows = len(columns['Date'])
+        header = {
+            'format': FORMAT_VERSION,
+            'symbol': symbol,
+            'interval': interval,
+            'columns': ['Date'] + COLUMNS,
+            'rows': rows,
+            'first': int(columns['Date'][0]) if rows else None,
+            'last': int(columns['Date'][-1]) if rows else None,
+            'generation': generation,
+            'base': generation,
+            'segments': [],
+            'checksum': rows_checksum(columns),
+        }
+        atomic_write_json(self._header_path(symbol, interval), header)
+        if '/' not in interval:
+            self.manifest.update(header)
+
+        if old_header:
+            old_base = old_header.get('base', old_header['generation'])
+            shutil.rmtree(os.path.join(series_dir, f"base.{old_base}"), ignore_errors=True)
+            for name in old_header.get('segments', []):
+                try:
+                    os.remove(os.path.join(series_dir, name))
+                except OSError:
+                    pass
+        return header
+
+    def write(self, symbol, df, interval=DEFAULT_INTERVAL):
+        """Replace the whole series with the candles in `df`."""
+        with self._lock(symbol):
+            return self._write_series(symbol, frame_to_columns(df), interval)
+
+    def append(self, symbol, df, interval=DEFAULT_INTERVAL):
+        """
+        Add candles newer than the stored history as a small journal segment.
+        Only the new rows and the header are written; the base columns are
+        left untouched until the next compaction.
+        """
+        if is_partitioned(interval):
+            return self._append_partitioned(symbol, frame_to_columns(df), interval)
+        return self._append_columns(symbol, frame_to_columns(df), interval)
+
+    def _append_partitioned(self, symbol, new_columns, interval):
+        """Route new intraday rows to their monthly partitions and update the aggregate header."""
+        with self._lock(symbol):
+            header = self._read_header_file(symbol, interval)
+            if header and header.get('last') is not None:
+                keep = new_columns['Date'] > header['last']
+                new_columns = {col: arr[keep] for col, arr in new_columns.items()}
+            if not len(new_columns['Date']):
+                return header
+
+            months = new_columns['Date'].astype('datetime64[s]').astype('datetime64[M]').astype(str)
+            for key in np.unique(months):
+                mask = months == key
+                self._append_columns(symbol, {col: arr[mask] for col, arr in new_columns.items()},
+                                     f"{interval}/{key}")
+
+            previous = header['checksum'] if header else 0
+            header = {
+                'format': FORMAT_VERSION,
+                'symbol': symbol,
+                'interval': interval,
+                'columns': ['Date'] + COLUMNS,
+                'rows': (header['rows'] if header else 0) + len(new_columns['Date']),
+                'first': header['first'] if header else int(new_columns['Date'][0]),
+                'last': int(new_columns['Date'][-1]),
+                'generation': (header['generation'] if header else 0) + 1,
+                'partitions': sorted(set(header['partitions'] if header else []) | {str(k) for k in np.unique(months)}),
+                'checksum': rows_checksum(new_columns, previous),
+            }
+            os.makedirs(self._series_dir(symbol, interval), exist_ok=True)
+            atomic_write_json(self._header_path(symbol, interval), header)
+            self.manifest.update(header)
+            return header
+
+    def _append_columns(self, symbol, new_columns, interval):
+        with self._lock(symbol):
+            header = self.header(symbol, interval)
+            if header is None or not header.get('rows'):
+                return self._write_series(symbol, new_columns, interval)
+
+            keep = new_columns['Date'] > header['last']
+            if not keep.any():
+                return header
+
+            segment = np.empty(int(keep.sum()), dtype=SEGMENT_DTYPE)
+            for col in ['Date'] + COLUMNS:
+                segment[col] = new_columns[col][keep]
+
+            generation = header['generation'] + 1
+            name = f"seg.{generation}.npy"
+            path = os.path.join(self._series_dir(symbol, interval), name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, segment)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            previous = header.get('checksum')
+            if previous is None:
+                previous = rows_checksum(self.read_arrays(symbol, interval=interval))
+
+            header = dict(header)
+            header['generation'] = generation
+            header['rows'] = header['rows'] + len(segment)
+            header['last'] = int(segment['Date'][-1])
+            header['segments'] = header.get('segments', []) + [name]
+            header['checksum'] = zlib.crc32(segment.tobytes(), previous)
+            atomic_write_json(self._header_path(symbol, interval), header)
+            if '/' not in interval:
+                self.manifest.update(header)
+            return header
+
+    # ---------- compaction ----------
+
+    def needs_compaction(self, symbol, interval=DEFAULT_INTERVAL):
+        header = self._read_header_file(symbol, interval)
+        if header and is_partitioned(interval):
+            # Only the newest partition receives appends.
+            return self.needs_compaction(symbol, f"{interval}/{header['partitions'][-1]}")
+        return bool(header) and len(header.get('segments', [])) >= COMPACT_AFTER_SEGMENTS
+
+    def compact(self, symbol, interval=DEFAULT_INTERVAL):
+        """Fold all journal segments into a new base generation."""
+        with self._lock(symbol):
+            header = self._read_header_file(symbol, interval)
+            if header and is_partitioned(interval):
+                for key in header['partitions']:
+                    self.compact(symbol, f"{interval}/{key}")
+                return header
+            if not header or not header.get('segments'):
+                return header
+            columns = self.read_arrays(symbol, interval=interval)
+            return self._write_series(symbol, columns, interval)
+
+    def compact_all(self, force=False):
+        """Compact every series that has accumulated enough segments (or any, with force=True)."""
+        compacted = []
+        for symbol in self.symbols():
+            header = self._read_header_file(symbol, DEFAULT_INTERVAL)
+            if not header or not header.get('segments'):
+                continue
+            if force or self.needs_compaction(symbol):
+                self.compact(symbol)
+                compacted.append(symbol)
+        return compacted
+
+    # ---------- migration ----------
+
+    def migrate_json(self, symbol):
+        """Convert data/<SYMBOL>.json into the columnar layout. Returns rows written."""
+        path = self._legacy_json_path(symbol)
+        with open(path, 'r') as f:
+            raw = json.load(f)
+        if not raw:
+            return 0
+        with self._lock(symbol):
+            if os.path.exists(self._header_path(symbol)):
+                return 0
+            header = self._write_series(symbol, frame_to_columns(pd.DataFrame(raw)))
+        return header['rows']
+
+    def migrate_all(self):
+        """One-shot migration of every legacy JSON file in the data directory."""
+        results = {}
+        for name in sorted(os.listdir(self.data_dir)):
+            if not name.endswith('.json'):
+                continue
+            symbol = name[:-len('.json')]
+            try:
+                results[symbol] = self.migrate_json(symbol)
+            except Exception as e:
+                results[symbol] = f"ERROR: {e}"
+        return results
+
+
+if __name__ == "__main__":
+    import sys
+    from config import DATA_DIR
+
+    store = OHLCVStore(DATA_DIR)
+    if '--compact' in sys.argv:
+        print(f"Compacted: {store.compact_all(force=True)}")
+    else:
+        for sym, result in store.migrate_all().items():
+            print(f"{sym}: {result}")
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tech_prototype.settings')
 
 application = get_wsgi_application()
+
+# Index the market snapshot for search at startup rather than on the first search request.
+from web.views import market_facade  # noqa: E402
+market_facade.warm_up()
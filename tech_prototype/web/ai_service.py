@@ -26,15 +26,25 @@ BACKUP_TVL = {
 }
 
 
-def get_session():
+def _pooled_session():
     session = requests.Session()
     retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=16)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
 
+# Built at import: the detail page calls these helpers from several threads at once,
+# and a lazily created session could be built twice.
+_session = _pooled_session()
+
+
+def get_session():
+    """Session for the news, market and on-chain lookups made from the web process."""
+    return _session
+
+
 def get_sentiment_analysis(symbol):
     coin_symbol = symbol.split('-')[0]
     url = f"https://min-api.cryptocompare.com/data/v2/news/?lang=EN&categories={coin_symbol}"
@@ -0,0 +1,206 @@
+"""
+In-process caches used by the facade.
+
+FrameCache keeps typed candle DataFrames read from the OHLCVStore in an LRU
+bounded by memory. Entries are tagged with the series generation from the
+store header, which every append and compaction bumps, so a pipeline write
+invalidates the cached frame on the next lookup without any explicit
+signal between the two. There is one entry per series; a ranged read is
+sliced out of it, so windows that slide with every new bar still hit.
+
+ResultCache is a TTL + LRU cache for remote call results (TA analyses),
+optionally persisted to SQLite so a restart does not start cold. It also
+tracks how much remote latency its hits saved.
+"""
+import json
+import time
+import numpy as np
+import sqlite3
+from contextlib import contextmanager
+import threading
+from collections import OrderedDict
+from store import to_epoch
+
+
+class FrameCache:
+    def __init__(self, store, max_bytes=256 * 1024 * 1024):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (symbol, interval) -> (generation, df, nbytes, start_ts, end_ts)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def read(self, symbol, start=None, end=None, interval='1d'):
+        """
+        Same contract as OHLCVStore.read, served from the cache while the
+        series generation is unchanged. Callers must not mutate the result.
+        """
+        header = self.store.header(symbol, interval)
+        if header is None:
+            return None
+        generation = header.get('generation')
+        key = (symbol, interval)
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                if _covers(entry[3], entry[4], start_ts, end_ts):
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return _slice(entry[1], start_ts, end_ts)
+                # Same series, wider range: read the union so both windows are served afterwards.
+                start_ts = None if start_ts is None or entry[3] is None else min(start_ts, entry[3])
+                end_ts = None if end_ts is None or entry[4] is None else max(end_ts, entry[4])
+            self.stats['misses'] += 1
+
+        df = self.store.read(symbol, start=start_ts, end=end_ts, interval=interval)
+        if df is None:
+            return None
+
+        nbytes = int(df.memory_usage(index=True).sum())
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (generation, df, nbytes, start_ts, end_ts)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, _, evicted, _, _) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self.stats['evictions'] += 1
+        return _slice(df, to_epoch(start), to_epoch(end))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                hit_ratio=(self.stats['hits'] / lookups) if lookups else None,
+            )
+
+
+def _covers(cached_start, cached_end, start_ts, end_ts):
+    """Whether a frame read with [cached_start, cached_end] holds every row of [start_ts, end_ts] (None = open)."""
+    return ((cached_start is None or (start_ts is not None and start_ts >= cached_start)) and
+            (cached_end is None or (end_ts is not None and end_ts <= cached_end)))
+
+
+def _slice(df, start_ts, end_ts):
+    """Rows with start_ts <= Date <= end_ts; the frame itself when nothing is cut."""
+    dates = df['Date'].to_numpy()
+    lo = 0 if start_ts is None else int(dates.searchsorted(np.datetime64(start_ts, 's'), side='left'))
+    hi = len(df) if end_ts is None else int(dates.searchsorted(np.datetime64(end_ts, 's'), side='right'))
+    if lo == 0 and hi == len(df):
+        return df
+    return df.iloc[lo:hi]
+
+
+class ResultCache:
+    def __init__(self, max_entries=2048, ttl=6 * 3600, persist_path=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at, cost_seconds)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'saved_seconds': 0.0}
+        if persist_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, cost REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.persist_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self, key):
+        """Look a key up in the persistent table (memory miss)."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at, cost FROM results WHERE key = ? AND expires_at > ?",
+                    (key, self.clock())
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def _store(self, key, entry):
+        try:
+            with self._connect() as conn:
+                now = self.clock()
+                conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(entry[0]), entry[1], entry[2]))
+                conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        except sqlite3.Error:
+            pass
+
+    def get(self, key):
+        """Return the cached value or None (expired entries count as misses)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+        if entry is None and self.persist_path:
+            entry = self._load(key)
+            if entry is not None:
+                self._put_memory(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            self.stats['saved_seconds'] += entry[2]
+            return entry[0]
+
+    def _put_memory(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def put(self, key, value, cost=0.0):
+        """Cache `value`; `cost` is the remote call duration a later hit will save."""
+        entry = (value, self.clock() + self.ttl, cost)
+        self._put_memory(key, entry)
+        if self.persist_path:
+            self._store(key, entry)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                ttl=self.ttl,
+                persistent=bool(self.persist_path),
+                hit_ratio=(self.stats['hits'] / lookups) if lookups else None,
+            )
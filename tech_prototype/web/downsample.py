@@ -0,0 +1,71 @@
+"""
+Point reduction for the detail page charts.
+
+A 10y daily range has ~3650 points per series, several times more than the
+chart has pixels. These functions pick which rows to keep; every series of
+a chart is then sliced with the same indices so they stay aligned with the
+shared labels.
+
+    lttb_indices    Largest-Triangle-Three-Buckets: keeps the points that best
+                    preserve the line's shape, plus the global min and max.
+    minmax_indices  Min and max of every bucket (plus first and last), so the
+                    drawn envelope is exactly that of the full series.
+"""
+import numpy as np
+
+
+def lttb_indices(y, threshold):
+    """Indices of `threshold` points chosen by LTTB (x is the row position), plus the global extremes."""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # First and last points are fixed; the rest are split into threshold - 2 buckets.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = [0]
+    a = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket (the last point for the final bucket).
+        if b + 2 < len(edges):
+            next_lo, next_hi = edges[b + 1], edges[b + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = (next_lo + next_hi - 1) / 2.0
+        avg_y = y[next_lo:next_hi].mean()
+
+        xs = np.arange(lo, hi)
+        area = np.abs((a - avg_x) * (y[lo:hi] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected.append(a)
+    selected.append(n - 1)
+
+    extremes = [int(np.nanargmin(y)), int(np.nanargmax(y))]
+    return np.unique(np.concatenate([selected, extremes]))
+
+
+def minmax_indices(y, threshold):
+    """Indices of the min and max of each of threshold // 2 buckets, plus the first and last point."""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    selected = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            chunk = y[lo:hi]
+            selected.append(lo + int(np.nanargmin(chunk)))
+            selected.append(lo + int(np.nanargmax(chunk)))
+    return np.unique(selected)
+
+
+METHODS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+
+def downsample_indices(y, threshold, method='lttb'):
+    """Row indices to keep so that `y` is drawn with about `threshold` points."""
+    return METHODS[method](y, threshold)
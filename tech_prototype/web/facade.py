@@ -1,20 +1,86 @@
 import os
 import json
+import time
+import asyncio
+import logging
+import threading
+import numpy as np
 import pandas as pd
 import requests
 import concurrent.futures
 from datetime import datetime, timedelta
+from asgiref.sync import async_to_sync
 from .ai_service import get_sentiment_analysis, get_on_chain_data
+from store import OHLCVStore
+from snapshot import MarketSnapshot
+from rollups import read_rollup
+from .jobs import RefreshJobRunner
+from .cache import FrameCache, ResultCache
+from .search import SearchService
+from .service_client import ServiceClient
+from .downsample import downsample_indices
+from config import UNIVERSE_FILE
+
+logger = logging.getLogger(__name__)
 
 # URL of the Technical Analysis Microservice
 TA_SERVICE_URL = os.getenv("TA_SERVICE_URL", "http://localhost:8001")
 # URL of the Fundamental Analysis Microservice
 FA_SERVICE_URL = os.getenv("FA_SERVICE_URL", "http://localhost:8002")
+# Memory budget for parsed candle DataFrames kept between requests
+FRAME_CACHE_MB = int(os.getenv("FRAME_CACHE_MB", "256"))
+# TA results cache: entries, TTL in seconds and an optional SQLite file to persist it across restarts
+TA_CACHE_SIZE = int(os.getenv("TA_CACHE_SIZE", "2048"))
+TA_CACHE_TTL = int(os.getenv("TA_CACHE_TTL", str(6 * 3600)))
+TA_CACHE_FILE = os.getenv("TA_CACHE_FILE")
+# Latency budget for all remote calls of one detail page; slower services are shown as unavailable
+PAGE_BUDGET_SECONDS = float(os.getenv("PAGE_BUDGET_SECONDS", "10"))
+# Candle wire format for the TA service: "columnar" (epoch seconds, one array per column) or "records"
+TA_WIRE_FORMAT = os.getenv("TA_WIRE_FORMAT", "columnar")
+# Bars sent to the TA service on top of the warm-up it advertises on /capabilities
+TA_LOOKBACK_MARGIN = int(os.getenv("TA_LOOKBACK_MARGIN", "50"))
+# "push" sends candles with every TA call; "store" lets a TA service that mounts the
+# data store (DATA_STORE_DIR) read them itself, falling back to push if it cannot
+TA_DATA_MODE = os.getenv("TA_DATA_MODE", "push")
+# URL of the LSTM prediction service (HuggingFace Space)
+LSTM_SERVICE_URL = os.getenv("LSTM_SERVICE_URL", "http://localhost:7860")
+# Default per-call timeouts in seconds; the LSTM Space can take minutes to cold-start
+TA_TIMEOUT = float(os.getenv("TA_TIMEOUT", "20"))
+FA_TIMEOUT = float(os.getenv("FA_TIMEOUT", "20"))
+LSTM_TIMEOUT = float(os.getenv("LSTM_TIMEOUT", "300"))
+# How long a finished LSTM prediction is reused for the same symbol and target date
+LSTM_CACHE_TTL = int(os.getenv("LSTM_CACHE_TTL", str(6 * 3600)))
+# Circuit breaker: consecutive failures before a service is skipped, and for how many seconds
+SERVICE_FAILURE_THRESHOLD = int(os.getenv("SERVICE_FAILURE_THRESHOLD", "5"))
+SERVICE_RESET_TIMEOUT = float(os.getenv("SERVICE_RESET_TIMEOUT", "30"))
+# Send a second copy of an idempotent TA/FA call that has not answered after this many seconds (off when unset)
+SERVICE_HEDGE_AFTER = float(os.getenv("SERVICE_HEDGE_AFTER")) if os.getenv("SERVICE_HEDGE_AFTER") else None
+# Most points drawn per chart series; longer ranges are reduced with CHART_DOWNSAMPLE ("lttb" or "minmax")
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "800"))
+CHART_DOWNSAMPLE = os.getenv("CHART_DOWNSAMPLE", "lttb")
+# Rows of the detail page's history table rendered with the page and returned per /api/history/ call
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+
+# Pooled keep-alive clients shared by all requests of this process (see service_client.py)
+ta_client = ServiceClient("ta", TA_SERVICE_URL, timeout=TA_TIMEOUT, failure_threshold=SERVICE_FAILURE_THRESHOLD,
+                          reset_timeout=SERVICE_RESET_TIMEOUT, hedge_after=SERVICE_HEDGE_AFTER)
+fa_client = ServiceClient("fa", FA_SERVICE_URL, timeout=FA_TIMEOUT, failure_threshold=SERVICE_FAILURE_THRESHOLD,
+                          reset_timeout=SERVICE_RESET_TIMEOUT, hedge_after=SERVICE_HEDGE_AFTER)
+lstm_client = ServiceClient("lstm", LSTM_SERVICE_URL, timeout=LSTM_TIMEOUT,
+                            failure_threshold=SERVICE_FAILURE_THRESHOLD, reset_timeout=SERVICE_RESET_TIMEOUT)
+
+# Shared pool for blocking remote calls from the async detail path. It outlives each request's
+# event loop, so a call that misses the page budget finishes in the background instead of
+# holding the response.
+_remote_call_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix="remote-call")
+# LSTM predictions run on their own threads under LSTM_TIMEOUT, outside the page budget: a cold
+# Space can take minutes, and the page picks the prediction up from the cache on a later load.
+_lstm_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="lstm-call")
 
 try:
     from pipeline import run_pipeline
 except ImportError:
-    def run_pipeline():
+    def run_pipeline(**kwargs):
         print("Pipeline script not found!")
 
 # Global state to track service readiness
@@ -52,17 +118,18 @@ def wake_up_services_async():
             print(f"DEBUG: Services were woken {time_since_last.seconds}s ago, skipping...", flush=True)
             return
     
-    def trigger_and_wait(url, name, status_key, wait_time=60):
+    def trigger_and_wait(client, name, status_key, wait_time=60):
         """
         Trigger service wake-up with one request, wait for boot time, then verify.
         wait_time: seconds to wait before checking (default 60s for Render free tier)
         """
         print(f"DEBUG: Triggering wake-up for {name}...", flush=True)
+        url = f"{client.base_url}/"
         print(f"DEBUG: Target URL: {url}", flush=True)  # Log the exact URL
         
         # Step 1: Send initial wake-up trigger (this starts Render's boot process)
         try:
-            response = requests.get(url, timeout=5)
+            response = client.get("/", timeout=5, probe=True)
             print(f"DEBUG: Wake-up request sent to {name} - Status: {response.status_code}", flush=True)
         except requests.exceptions.Timeout:
             print(f"DEBUG: {name} timeout (expected - service is booting)...", flush=True)
@@ -78,7 +145,7 @@ def wake_up_services_async():
         # Step 3: Verify service is ready with one final health check
         print(f"DEBUG: Checking if {name} is ready at {url}...", flush=True)
         try:
-            response = requests.get(url, timeout=10)
+            response = client.get("/", timeout=10, probe=True)
             print(f"DEBUG: {name} health check response: {response.status_code}", flush=True)
             if response.status_code == 200:
                 print(f"DEBUG: ✓ {name} is READY!", flush=True)
@@ -108,14 +175,14 @@ def wake_up_services_async():
         with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
             ta_future = executor.submit(
                 trigger_and_wait, 
-                f"{TA_SERVICE_URL}/", 
+                ta_client,
                 "TA Service",
                 "ta_ready",
                 60  # Wait 60 seconds for boot
             )
             fa_future = executor.submit(
                 trigger_and_wait, 
-                f"{FA_SERVICE_URL}/", 
+                fa_client,
                 "FA Service",
                 "fa_ready",
                 60  # Wait 60 seconds for boot
@@ -140,17 +207,39 @@ def wake_up_services_async():
     threading.Thread(target=wake_all_services, daemon=True).start()
     print("DEBUG: Wake-up thread started in background", flush=True)
 
+# Daily-based timeframes materialized by the pipeline as rollup series (see rollups.py)
+ROLLUP_TIMEFRAMES = {"1w": "1wk", "1m": "1mo"}
+
+# Intraday timeframes served from the partitioned store: timeframe -> (stored interval, days of history).
+# Only the last `days` are read, which is enough for the TA warm-up without touching older partitions.
+INTRADAY_TIMEFRAMES = {
+    "15m": ("15m", 7),
+    "1h": ("1h", 30),
+    "4h": ("1h", 90),
+}
+
+
 class CryptoMarketFacade:
     def __init__(self, data_dir):
         self.data_dir = data_dir
+        self.store = OHLCVStore(data_dir)
+        self.refresh_jobs = RefreshJobRunner(data_dir, run_pipeline)
+        self.snapshot = MarketSnapshot(self.store)
+        self.search_index = SearchService(self.snapshot, UNIVERSE_FILE)
+        self.frame_cache = FrameCache(self.store, max_bytes=FRAME_CACHE_MB * 1024 * 1024)
         self.famous_coins = [
             'BTC-USD', 'ETH-USD', 'XRP-USD', 'SOL-USD', 'BNB-USD',
             'ADA-USD', 'DOGE-USD', 'TRX-USD', 'AVAX-USD', 'LTC-USD'
         ]
-        self.ta_cache = {
-            "data": None,
-            "last_update": None
-        }
+        self.ta_cache = ResultCache(max_entries=TA_CACHE_SIZE, ttl=TA_CACHE_TTL, persist_path=TA_CACHE_FILE)
+        # Strategy-set version reported by the TA service; part of every cache key.
+        self.ta_strategy_version = None
+        # (bars to send or None for the full history, serves /analyze/{symbol}, refresh after) from /capabilities
+        self.ta_window = (None, False, 0.0)
+        # Finished LSTM predictions by (symbol, date), and the calls still running
+        self.lstm_cache = ResultCache(max_entries=256, ttl=LSTM_CACHE_TTL)
+        self._lstm_inflight = {}
+        self._lstm_lock = threading.Lock()
 
     def format_price(self, value):
         try:
@@ -161,26 +250,27 @@ class CryptoMarketFacade:
         except:
             return "0.00"
 
+    def _snapshot_coins(self):
+        if not self.snapshot.exists():
+            # First start after an upgrade: build the snapshot once from the store.
+            self.snapshot.update()
+        return self.snapshot.coins()
+
+    def warm_up(self):
+        """Called once at startup: make sure the snapshot exists and index it for search in the background."""
+        self._snapshot_coins()
+        self.search_index.warm()
+
     def get_coin_basic_info(self, symbol):
-        file_path = os.path.join(self.data_dir, f"{symbol}.json")
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    if data:
-                        last = data[-1]
-                        open_p = float(last.get('Open', 0))
-                        close_p = float(last.get('Close', 0))
-                        change = ((close_p - open_p) / open_p * 100) if open_p else 0
-                        return {
-                            'symbol': symbol,
-                            'price': self.format_price(close_p),
-                            'change_raw': change,
-                            'change_str': f"{change:.2f}"
-                        }
-            except:
-                return None
-        return None
+        row = self._snapshot_coins().get(symbol)
+        if row is None:
+            return None
+        return {
+            'symbol': symbol,
+            'price': self.format_price(row['close']),
+            'change_raw': row['change'],
+            'change_str': f"{row['change']:.2f}"
+        }
 
     def get_market_leaders(self):
         display_coins = []
@@ -190,26 +280,38 @@ class CryptoMarketFacade:
                 display_coins.append(coin)
         return display_coins
 
-    def search_coins(self, query):
+    def search_coins(self, query, limit=None):
         display_coins = []
-        if os.path.exists(self.data_dir):
-            files = [f for f in os.listdir(self.data_dir) if f.endswith('.json')]
-            for file in files:
-                symbol = file.replace('.json', '')
-                if query.lower() in symbol.lower():
-                    coin = self.get_coin_basic_info(symbol)
-                    if coin:
-                        display_coins.append(coin)
+        self._snapshot_coins()
+        for symbol in self.search_index.search(query, limit):
+            coin = self.get_coin_basic_info(symbol)
+            if coin:
+                coin['name'] = self.search_index.name(symbol)
+                display_coins.append(coin)
         return display_coins
 
+    def count_coins(self):
+        return len(self._snapshot_coins())
+
     def refresh_database(self):
-        run_pipeline()
+        """Start the pipeline in the background; returns (job_id, started)."""
+        return self.refresh_jobs.start()
+
+    def refresh_status(self, job_id=None):
+        return self.refresh_jobs.status(job_id)
+
+    def get_metrics(self):
+        return {
+            'frame_cache': self.frame_cache.metrics(),
+            'ta_cache': self.ta_cache.metrics(),
+            'services': {client.name: client.metrics() for client in (ta_client, fa_client, lstm_client)},
+        }
 
     def resample_df(self, df, timeframe):
         if timeframe == "1d":
             return df.copy()
 
-        rule_map = {"1w": "W", "1m": "ME"}
+        rule_map = {"1w": "W", "1m": "ME", "5m": "5min", "15m": "15min", "1h": "h", "4h": "4h"}
         rule = rule_map.get(timeframe, "D")
 
         resampled = df.resample(rule, on="Date").agg({
@@ -222,51 +324,174 @@ class CryptoMarketFacade:
         
         return resampled
 
-    def _call_ta_service(self, df):
+    def load_timeframe(self, symbol, timeframe, daily_df):
+        """
+        Candles for a daily-based timeframe, read from the rollups instead of
+        resampling the history. The web process only reads them: rollups are
+        written by the pipeline at ingest, and a series it has not rolled up
+        yet is resampled from `daily_df` in memory.
+        """
+        if timeframe == "1d":
+            return daily_df
+        if timeframe in ROLLUP_TIMEFRAMES and self.store.exists(symbol, ROLLUP_TIMEFRAMES[timeframe]):
+            rollup = read_rollup(self.store, symbol, ROLLUP_TIMEFRAMES[timeframe])
+            if rollup is not None:
+                return rollup
+        return self.resample_df(daily_df, timeframe)
+
+    def load_intraday(self, symbol, timeframe):
+        """
+        Return (recent candles, epoch of the last source bar) for an intraday
+        timeframe, or (None, None) when the symbol has no stored bars at the
+        source interval. The read is bounded to the window in
+        INTRADAY_TIMEFRAMES, so only its monthly partitions are opened.
+        """
+        source, days = INTRADAY_TIMEFRAMES[timeframe]
+        entry = self.store.manifest.get(symbol, source)
+        if entry is None or entry['last_ts'] is None:
+            return None, None
+
+        start = entry['last_ts'] - days * 86400
+        df = self.frame_cache.read(symbol, start=start, interval=source)
+        if df is None or df.empty:
+            return None, None
+        source_last_ts = int(df['Date'].iloc[-1].timestamp())
+        if source == timeframe:
+            return df, source_last_ts
+        return self.resample_df(df, timeframe), source_last_ts
+
+    def _ta_capabilities(self):
+        """
+        (bars, store) from the TA service's /capabilities: how many trailing
+        bars it needs (its max lookback plus TA_LOOKBACK_MARGIN, None to send
+        everything when it does not say) and whether it reads the data store
+        itself, i.e. serves /analyze/{symbol}.
+        """
+        bars, store, refresh_at = self.ta_window
+        if time.time() < refresh_at:
+            return bars, store
         try:
-            df_to_send = df.copy()
+            r = ta_client.get("/capabilities", timeout=5)
+            if r.status_code == 200:
+                capabilities = r.json()
+                bars = capabilities["max_lookback"] + TA_LOOKBACK_MARGIN
+                store = bool(capabilities.get("store"))
+                self.ta_window = (bars, store, time.time() + 3600)
+                return bars, store
+        except Exception:
+            pass
+        # Older service or not reachable yet: send the full history and ask again in a minute.
+        self.ta_window = (None, False, time.time() + 60)
+        return None, False
 
-            if 'Date' not in df_to_send.columns:
-                df_to_send = df_to_send.reset_index()
+    def _ta_bars(self):
+        return self._ta_capabilities()[0]
 
-            if 'Datetime' in df_to_send.columns:
-                df_to_send = df_to_send.rename(columns={'Datetime': 'Date'})
+    def _ta_payload(self, df):
+        """
+        Request body for one series: columnar arrays with epoch-second dates, or
+        the original list of records when TA_WIRE_FORMAT=records (older services).
+        Only the tail the strategies need for their warm-up is sent.
+        """
+        bars = self._ta_bars()
+        df_to_send = df.tail(bars) if bars else df
 
-            df_to_send['Date'] = pd.to_datetime(df_to_send['Date'])
-            df_to_send['Date'] = df_to_send['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        if 'Date' not in df_to_send.columns:
+            df_to_send = df_to_send.reset_index()
 
-            data_payload = df_to_send.to_dict(orient='records')
+        if 'Datetime' in df_to_send.columns:
+            df_to_send = df_to_send.rename(columns={'Datetime': 'Date'})
 
-            print(f"DEBUG: Calling TA service at {TA_SERVICE_URL}/analyze")
-            response = requests.post(f"{TA_SERVICE_URL}/analyze", json={"data": data_payload}, timeout=20)
+        dates = pd.to_datetime(df_to_send['Date'])
 
-            if response.status_code == 200:
-                result = response.json()
+        if TA_WIRE_FORMAT == "records":
+            df_to_send = df_to_send[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+            df_to_send.insert(0, 'Date', dates.dt.strftime('%Y-%m-%d %H:%M:%S'))
+            return {"data": df_to_send.to_dict(orient='records')}
 
-                # NEW: support both old and new response formats
-                if "overall_signal" in result:
-                    return {
-                        "overall_signal": result.get("overall_signal", "N/A"),
-                        "overall_score": result.get("overall_score", 0),
-                        "signals": result.get("signals", [])
-                    }
+        columns = {"Date": dates.to_numpy().astype('datetime64[s]').astype('int64').tolist()}
+        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+            columns[col] = df_to_send[col].to_numpy(dtype='float64').tolist()
+        return {"columns": columns}
 
-                # OLD fallback:
-                return {
-                    "overall_signal": result.get("signal", "N/A"),
-                    "overall_score": 0,
-                    "signals": []
-                }
+    def _call_ta_service(self, df):
+        try:
+            body = self._ta_payload(df)
+
+            print(f"DEBUG: Calling TA service at {TA_SERVICE_URL}/analyze")
+            response = ta_client.post("/analyze", json=body, hedge=True)
+
+            if response.status_code == 200:
+                return self._ta_result(response.json())
 
             return {"overall_signal": "Error", "overall_score": 0, "signals": []}
 
         except Exception:
             return {"overall_signal": "Service Down", "overall_score": 0, "signals": []}
 
+    def _call_ta_by_symbol(self, symbol, timeframe):
+        """Symbol-addressed analysis (TA_DATA_MODE=store); None when the service cannot serve it."""
+        try:
+            print(f"DEBUG: Calling TA service at {TA_SERVICE_URL}/analyze/{symbol}?timeframe={timeframe}")
+            response = ta_client.get(f"/analyze/{symbol}", params={"timeframe": timeframe},
+                                     endpoint="/analyze/{symbol}", hedge=True)
+            if response.status_code == 200:
+                return self._ta_result(response.json())
+        except Exception:
+            pass
+        return None
+
+    @staticmethod
+    def _ta_result(result):
+        # NEW: support both old and new response formats
+        if "overall_signal" in result:
+            return {
+                "overall_signal": result.get("overall_signal", "N/A"),
+                "overall_score": result.get("overall_score", 0),
+                "signals": result.get("signals", []),
+                "strategy_version": result.get("strategy_version")
+            }
+
+        # OLD fallback:
+        return {
+            "overall_signal": result.get("signal", "N/A"),
+            "overall_score": 0,
+            "signals": []
+        }
+
+    def _ta_cache_key(self, symbol, timeframe, last_ts, version=None):
+        return f"{symbol}|{timeframe}|{last_ts}|{version or self.ta_strategy_version}"
+
+    def _analyze(self, symbol, timeframe, df, last_ts):
+        """
+        TA result for `df`, cached on (symbol, timeframe, last candle, strategy version).
+        The analysis cannot change until a new candle lands in the source series.
+        """
+        result = self.ta_cache.get(self._ta_cache_key(symbol, timeframe, last_ts))
+        if result is not None:
+            return result
+
+        started = time.perf_counter()
+        result = None
+        if TA_DATA_MODE == "store" and self._ta_capabilities()[1]:
+            result = self._call_ta_by_symbol(symbol, timeframe)
+        if result is None:
+            result = self._call_ta_service(df)
+        elapsed = time.perf_counter() - started
+
+        if result["overall_signal"] in ("Error", "Service Down"):
+            return result
+        # Always key on the version that produced the result; a redeploy with
+        # different strategies moves every later lookup to the new version.
+        version = result.get("strategy_version")
+        self.ta_strategy_version = version
+        self.ta_cache.put(self._ta_cache_key(symbol, timeframe, last_ts, version), result, cost=elapsed)
+        return result
+
     def _get_sentiment_from_service(self, symbol):
         try:
             print(f"DEBUG: Calling FA sentiment at {FA_SERVICE_URL}/sentiment/{symbol}")
-            r = requests.get(f"{FA_SERVICE_URL}/sentiment/{symbol}", timeout=20)
+            r = fa_client.get(f"/sentiment/{symbol}", endpoint="/sentiment/{symbol}", hedge=True)
             if r.status_code == 200:
                 return r.json()
         except:
@@ -276,43 +501,140 @@ class CryptoMarketFacade:
     def _get_on_chain_from_service(self, symbol):
         try:
             print(f"DEBUG: Calling FA onchain at {FA_SERVICE_URL}/onchain/{symbol}")
-            r = requests.get(f"{FA_SERVICE_URL}/onchain/{symbol}", timeout=20)
+            r = fa_client.get(f"/onchain/{symbol}", endpoint="/onchain/{symbol}", hedge=True)
             if r.status_code == 200:
                 return r.json()
         except Exception:
             pass
         return None
 
-    def get_coin_details(self, symbol, timeframe='1m'):
-        print(f"DEBUG: get_coin_details START for {symbol}", flush=True)
-        file_path = os.path.join(self.data_dir, f"{symbol}.json")
+    def _get_lstm_prediction(self, symbol, target_date):
+        """Returns (prediction, error) from the LSTM service."""
+        try:
+            # Call external LSTM service via HTTP (HuggingFace can be slow; LSTM_TIMEOUT covers a cold start)
+            response = lstm_client.post(
+                "/predict",
+                json={
+                    "symbol": symbol,
+                    "target_date": target_date
+                }
+            )
 
-        if not os.path.exists(file_path):
-            print(f"DEBUG: File not found: {file_path}", flush=True)
-            return None, "File not found"
+            if response.status_code == 200:
+                return response.json(), None
+            return None, f"LSTM Service Error: {response.status_code} - {response.text}"
+
+        except requests.exceptions.Timeout:
+            return None, "LSTM prediction took too long (HuggingFace Space may be sleeping). Please try again in a moment."
+        except requests.exceptions.ConnectionError:
+            return None, "Cannot connect to LSTM service. Please try again later."
+        except Exception as e:
+            return None, str(e)
 
+    def _lstm_future(self, symbol, target_date):
+        """
+        Future of the prediction for (symbol, target_date). A call already
+        running for the same key is joined instead of started again, and a
+        successful prediction is kept in lstm_cache when it finishes, even if
+        the page that asked for it has already been rendered.
+        """
+        key = f"{symbol}|{target_date}"
+        with self._lstm_lock:
+            future = self._lstm_inflight.get(key)
+            if future is None:
+                future = _lstm_pool.submit(self._get_lstm_prediction, symbol, target_date)
+                self._lstm_inflight[key] = future
+                future.add_done_callback(lambda f: self._lstm_done(key, f))
+        return future
+
+    def _lstm_done(self, key, future):
+        with self._lstm_lock:
+            self._lstm_inflight.pop(key, None)
+        if future.exception() is None:
+            prediction, error = future.result()
+            if prediction is not None:
+                self.lstm_cache.put(key, prediction)
+
+    @staticmethod
+    def _failed(value):
+        """Whether a remote helper's return value reports a failure (they catch their own errors)."""
+        if value is None:
+            return True
+        if isinstance(value, tuple):  # (prediction, error)
+            return value[0] is None
+        if isinstance(value, dict):
+            return value.get("overall_signal") in ("Error", "Service Down")
+        return False
+
+    async def _timed_call(self, call):
+        """`call` is (fn, *args) to run on the remote-call pool, or a concurrent future to wait for."""
+        started = time.perf_counter()
         try:
-            with open(file_path, 'r') as f:
-                raw_data = json.load(f)
-            print(f"DEBUG: JSON loaded, {len(raw_data)} records", flush=True)
+            if isinstance(call, concurrent.futures.Future):
+                # Shielded: a page that gives up must not cancel a call other pages may join.
+                value = await asyncio.shield(asyncio.wrap_future(call))
+            else:
+                value = await asyncio.get_running_loop().run_in_executor(_remote_call_pool, *call)
+            status = "failed" if self._failed(value) else "ok"
         except Exception as e:
-            print(f"DEBUG: JSON load error: {e}", flush=True)
-            return None, "Invalid JSON"
+            name = call[0].__name__ if isinstance(call, tuple) else "future"
+            logger.warning("remote call %s failed: %s", name, e)
+            value, status = None, "error"
+        return value, status, time.perf_counter() - started
 
-        df = pd.DataFrame(raw_data)
-        df['Date'] = pd.to_datetime(df['Date'])
+    async def _fan_out(self, calls, budget):
+        """
+        Run the blocking remote `calls` ({name: (fn, *args) or future})
+        concurrently on threads and wait at most `budget` seconds for all of
+        them. Returns ({name: value} for calls that returned, {name: timing}
+        with status ok, failed, error or timeout); calls that miss the budget
+        are left to finish in the background and ignored.
+        """
+        tasks = {asyncio.create_task(self._timed_call(call)): name for name, call in calls.items()}
+        if not tasks:
+            return {}, {}
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+
+        results, timings = {}, {}
+        for task in done:
+            value, status, elapsed = task.result()
+            name = tasks[task]
+            timings[name] = {"ms": round(elapsed * 1000, 1), "status": status}
+            if status != "error":
+                # Failed results are still returned: they carry the error shown on the page.
+                results[name] = value
+        for task in pending:
+            task.cancel()
+            timings[tasks[task]] = {"ms": round(budget * 1000, 1), "status": "timeout"}
+        return results, timings
+
+    def get_coin_details(self, symbol, timeframe='1m', predict_symbol=None, predict_date=None):
+        return async_to_sync(self.get_coin_details_async)(symbol, timeframe, predict_symbol, predict_date)
+
+    async def get_coin_details_async(self, symbol, timeframe='1m', predict_symbol=None, predict_date=None,
+                                     budget=PAGE_BUDGET_SECONDS):
+        """
+        Local data is prepared first; then every remote call (TA per timeframe,
+        FA sentiment and on-chain, optional LSTM prediction) is issued at once
+        under one page budget, so the page takes max(calls) instead of their
+        sum. Services that miss the budget are rendered as unavailable.
+        """
+        logger.debug("get_coin_details start for %s", symbol)
 
-        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-            df[col] = df[col].astype(float)
+        # Store reads block on disk, so they run on a thread rather than on the event loop.
+        try:
+            df = await asyncio.to_thread(self.frame_cache.read, symbol)
+        except Exception as e:
+            logger.warning("store read error for %s: %s", symbol, e)
+            return None, "Invalid data"
 
-        end_date = df['Date'].max()
+        if df is None or df.empty:
+            logger.debug("no data in store for %s", symbol)
+            return None, "File not found"
+        logger.debug("store loaded, %d records", len(df))
 
-        if timeframe == '1y':
-            start_date = end_date - timedelta(days=365)
-        elif timeframe == '10y':
-            start_date = end_date - timedelta(days=365 * 10)
-        else:
-            start_date = end_date - timedelta(days=30)
+        end_date = df['Date'].max()
+        start_date = self._range_start(end_date, timeframe)
 
         mask = (df['Date'] >= start_date) & (df['Date'] <= end_date)
         filtered_df = df.loc[mask].copy()
@@ -321,28 +643,60 @@ class CryptoMarketFacade:
         filtered_df['EMA_7'] = filtered_df['Close'].ewm(span=7, adjust=False).mean()
         filtered_df = filtered_df.fillna(0)
 
-        chart_dates = filtered_df['Date'].dt.strftime('%Y-%m-%d').tolist()
-        chart_closes = filtered_df['Close'].tolist()
-        chart_sma = filtered_df['SMA_7'].tolist()
-        chart_ema = filtered_df['EMA_7'].tolist()
+        # SMA/EMA are computed on every day above; only the drawn points are thinned out.
+        chart_df = filtered_df
+        if len(chart_df) > CHART_MAX_POINTS:
+            keep = downsample_indices(chart_df['Close'].to_numpy(), CHART_MAX_POINTS, CHART_DOWNSAMPLE)
+            chart_df = chart_df.iloc[keep]
+
+        chart_dates = chart_df['Date'].dt.strftime('%Y-%m-%d').tolist()
+        chart_closes = chart_df['Close'].tolist()
+        chart_sma = chart_df['SMA_7'].tolist()
+        chart_ema = chart_df['EMA_7'].tolist()
+
+        # 1w/1m buckets keep their label while candles land, so key them all on the last daily candle.
+        daily_last_ts = int(df['Date'].iloc[-1].timestamp())
+        not_enough = {"overall_signal": "N/A", "overall_score": 0, "signals": []}
+        unavailable = {"overall_signal": "Timeout", "overall_score": 0, "signals": []}
+
+        calls = {
+            "sentiment": (self._get_sentiment_from_service, symbol),
+            "on_chain": (self._get_on_chain_from_service, symbol),
+        }
+        ta_timeframes = []
+        for tf in ["1d", "1w", "1m"]:
+            tf_df = await asyncio.to_thread(self.load_timeframe, symbol, tf, df)
+            ta_timeframes.append(tf)
+            if len(tf_df) >= 50:
+                calls[f"ta_{tf}"] = (self._analyze, symbol, tf, tf_df, daily_last_ts)
+
+        intraday_timeframes = []
+        for tf in INTRADAY_TIMEFRAMES:
+            # A resampled bucket (4h from 1h) keeps its label while bars land in it; key on the source bar.
+            tf_df, source_last_ts = await asyncio.to_thread(self.load_intraday, symbol, tf)
+            if tf_df is None:
+                continue
+            intraday_timeframes.append(tf)
+            if len(tf_df) >= 50:
+                calls[f"ta_{tf}"] = (self._analyze, symbol, tf, tf_df, source_last_ts)
 
-        sentiment_data = None
-        on_chain_data = None
+        cached_prediction = None
+        if predict_symbol and predict_date:
+            cached_prediction = self.lstm_cache.get(f"{predict_symbol}|{predict_date}")
+            if cached_prediction is None:
+                calls["lstm"] = self._lstm_future(predict_symbol, predict_date)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # CALLING NEW MICROSERVICE METHODS
-            future_sentiment = executor.submit(self._get_sentiment_from_service, symbol)
-            future_on_chain = executor.submit(self._get_on_chain_from_service, symbol)
+        results, call_timings = await self._fan_out(calls, budget)
+        logger.debug("remote calls: %s", call_timings)
 
-            try:
-                sentiment_data = future_sentiment.result()
-            except Exception as e:
-                print(f"Sentiment error: {e}")
+        def ta_result(tf):
+            name = f"ta_{tf}"
+            if name not in calls:
+                return not_enough
+            return results.get(name, unavailable)
 
-            try:
-                on_chain_data = future_on_chain.result()
-            except Exception as e:
-                print(f"On-chain error: {e}")
+        sentiment_data = results.get("sentiment")
+        on_chain_data = results.get("on_chain")
 
         try:
             current_price = df['Close'].iloc[-1]
@@ -361,34 +715,33 @@ class CryptoMarketFacade:
         ta_signals = {}  # just BUY/SELL/HOLD for the 3 cards
         ta_details = {}  # full response for tables
 
-        for tf in ["1d", "1w", "1m"]:
-            tf_df = self.resample_df(df, tf)
-
-            if len(tf_df) < 50:
-                ta_signals[tf] = "N/A"
-                ta_details[tf] = {"overall_signal": "N/A", "overall_score": 0, "signals": []}
-                continue
-
-            result = self._call_ta_service(tf_df)
-
+        for tf in ta_timeframes:
+            result = ta_result(tf)
             ta_signals[tf] = result.get("overall_signal", "N/A")
             ta_details[tf] = result
 
-        table_data = filtered_df.sort_values(by='Date', ascending=False).to_dict('records')
-        for row in table_data:
-            row['Date'] = row['Date'].strftime('%Y-%m-%d')
-            if row['Open'] > 0:
-                chg = ((row['Close'] - row['Open']) / row['Open']) * 100
-                row['change_str'] = f"{chg:.2f}"
-                row['change_raw'] = chg
+        intraday_signals = []
+        for tf in intraday_timeframes:
+            result = ta_result(tf)
+            ta_details[tf] = result
+            intraday_signals.append({"timeframe": tf, "signal": result.get("overall_signal", "N/A")})
+
+        ai_prediction_result, ai_error = cached_prediction, None
+        if "lstm" in calls:
+            if "lstm" in results:
+                ai_prediction_result, ai_error = results["lstm"]
             else:
-                row['change_str'] = "0.00"
-                row['change_raw'] = 0
+                ai_error = "The LSTM prediction is still running. Reload the page in a moment to see it."
+
+        # Only the first screen of the table is rendered; the page fetches older rows from /api/history/.
+        history = self.get_history_page(symbol, timeframe)
 
         context = {
             'symbol': symbol,
             'timeframe': timeframe,
-            'table_data': table_data,
+            'table_data': history['rows'],
+            'table_next_before': history['next_before'],
+            'table_total': history['total'],
             'chart_labels': json.dumps(chart_dates),
             'chart_closes': json.dumps(chart_closes),
             'chart_sma': json.dumps(chart_sma),
@@ -396,12 +749,120 @@ class CryptoMarketFacade:
             'sentiment': sentiment_data,
             'on_chain': on_chain_data,
             'ta_signals': ta_signals,
-            'ta_details': ta_details
+            'intraday_signals': intraday_signals,
+            'ta_details': ta_details,
+            'ai_prediction_result': ai_prediction_result,
+            'ai_error': ai_error,
+            'call_timings': call_timings
         }
         return context, None
 
-    def compute_all_coin_signals(self):
-        # Can also use microservice or cache here
-        # For brevity, implementing similar loop
-        # We can implement a bulk API endpoint later
-        pass
+    @staticmethod
+    def _range_start(end_date, timeframe):
+        """First date shown on the detail page for a '1m' (30 days), '1y' or '10y' range."""
+        if timeframe == '1y':
+            return end_date - timedelta(days=365)
+        if timeframe == '10y':
+            return end_date - timedelta(days=365 * 10)
+        return end_date - timedelta(days=30)
+
+    def get_history_page(self, symbol, timeframe='1m', before=None, limit=HISTORY_PAGE_SIZE):
+        """
+        One page of the detail table, newest first: up to `limit` daily rows
+        of the `timeframe` range older than the `before` cursor (epoch
+        seconds). `next_before` is the cursor for the following page, None on
+        the last one. Returns None when the symbol has no data.
+        """
+        df = self.frame_cache.read(symbol)
+        if df is None or df.empty:
+            return None
+
+        dates = df['Date'].to_numpy()
+        lo = int(dates.searchsorted(np.datetime64(self._range_start(df['Date'].iloc[-1], timeframe))))
+        hi = len(df) if before is None else int(dates.searchsorted(np.datetime64(int(before), 's')))
+        hi = max(hi, lo)
+        page_lo = max(lo, hi - limit)
+        page = df.iloc[page_lo:hi].iloc[::-1]
+
+        open_p = page['Open'].to_numpy()
+        close_p = page['Close'].to_numpy()
+        change = np.divide((close_p - open_p) * 100, open_p, out=np.zeros(len(page)), where=open_p > 0)
+
+        keys = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'change']
+        columns = [page['Date'].dt.strftime('%Y-%m-%d').tolist()]
+        columns += [page[col].tolist() for col in ['Open', 'High', 'Low', 'Close', 'Volume']]
+        columns.append(change.tolist())
+        return {
+            'rows': [dict(zip(keys, values)) for values in zip(*columns)],
+            'next_before': int(page['Date'].iloc[-1].timestamp()) if page_lo > lo else None,
+            'total': len(df) - lo,
+        }
+
+    def _call_ta_batch(self, items):
+        """POST many series to /analyze/batch; returns {(symbol, timeframe): result}, or None."""
+        try:
+            print(f"DEBUG: Calling TA batch at {TA_SERVICE_URL}/analyze/batch with {len(items)} series")
+            response = ta_client.post("/analyze/batch", json={"items": items}, timeout=120)
+            if response.status_code == 200:
+                return {
+                    (result.get("symbol"), result.get("timeframe")): result
+                    for result in response.json().get("results") or [] if isinstance(result, dict)
+                }
+        except Exception as e:
+            print(f"DEBUG: TA batch error: {e}")
+        return None
+
+    def compute_all_coin_signals(self, timeframes=("1d", "1w", "1m")):
+        """
+        TA signals for every coin in the market snapshot. Results still valid
+        in the TA cache are reused; everything else is analyzed in a single
+        /analyze/batch request instead of one call per coin and timeframe.
+        Returns the snapshot info of each coin with a `signals` {timeframe: signal} dict.
+        """
+        coins = []
+        items = []
+        pending = []  # (coin, timeframe, last_ts) per batch item
+
+        for symbol in sorted(self._snapshot_coins()):
+            df = self.frame_cache.read(symbol)
+            coin = self.get_coin_basic_info(symbol)
+            if df is None or df.empty or coin is None:
+                continue
+            daily_last_ts = int(df['Date'].iloc[-1].timestamp())
+            coin['signals'] = {}
+
+            for tf in timeframes:
+                tf_df = self.load_timeframe(symbol, tf, df)
+                if len(tf_df) < 50:
+                    coin['signals'][tf] = "N/A"
+                    continue
+                cached = self.ta_cache.get(self._ta_cache_key(symbol, tf, daily_last_ts))
+                if cached is not None:
+                    coin['signals'][tf] = cached.get("overall_signal", "N/A")
+                    continue
+                items.append(dict(self._ta_payload(tf_df), symbol=symbol, timeframe=tf))
+                pending.append((coin, tf, daily_last_ts))
+            coins.append(coin)
+
+        if items:
+            started = time.perf_counter()
+            results = self._call_ta_batch(items)
+            cost = (time.perf_counter() - started) / len(items)
+            for coin, tf, last_ts in pending:
+                if results is None:
+                    coin['signals'][tf] = "Service Down"
+                    continue
+                raw = results.get((coin['symbol'], tf))
+                if raw is None:
+                    # Partial or mismatched response: only this series is affected.
+                    coin['signals'][tf] = "Error"
+                    continue
+                # Same entry shape as the single-call path caches.
+                result = self._ta_result(raw)
+                coin['signals'][tf] = result.get("overall_signal", "N/A")
+                if coin['signals'][tf] != "Error":
+                    version = result.get("strategy_version")
+                    self.ta_strategy_version = version
+                    self.ta_cache.put(self._ta_cache_key(coin['symbol'], tf, last_ts, version), result, cost=cost)
+
+        return coins
@@ -0,0 +1,125 @@
+"""
+Background refresh job for the pipeline.
+
+`RefreshJobRunner.start()` returns a job id immediately and runs the pipeline
+on a daemon thread. Progress is written to a small JSON status file after
+every finished download task, so any gunicorn worker can answer status
+requests. An exclusive `flock` on a lock file next to it keeps a second
+refresh from starting while one is running, in this or any other process.
+Both files live in data/jobs/, away from the legacy <SYMBOL>.json files that
+the store migrates.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+from store import atomic_write_json
+
+# Minimum seconds between two status file writes while a job is running.
+STATUS_WRITE_INTERVAL = 1.0
+
+
+class RefreshJobRunner:
+    def __init__(self, data_dir, run_pipeline):
+        self.run_pipeline = run_pipeline
+        jobs_dir = os.path.join(data_dir, 'jobs')
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.lock_path = os.path.join(jobs_dir, 'refresh.lock')
+        self.status_path = os.path.join(jobs_dir, 'refresh_status.json')
+        self._thread_lock = threading.Lock()
+
+    def _acquire(self):
+        """Take the cross-process lock; returns the open lock file or None when it is held."""
+        if not self._thread_lock.acquire(blocking=False):
+            return None
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                self._thread_lock.release()
+                return None
+        return lock_file
+
+    def _release(self, lock_file):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+        self._thread_lock.release()
+
+    def status(self, job_id=None):
+        """Return the last written job status, or None (also when `job_id` does not match)."""
+        try:
+            with open(self.status_path, 'r') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job_id is not None and status.get('job_id') != job_id:
+            return None
+        return status
+
+    def start(self, **pipeline_kwargs):
+        """
+        Start a refresh in the background. Returns (job_id, True) for a new job,
+        or (running_job_id, False) when a refresh is already in progress.
+        """
+        lock_file = self._acquire()
+        if lock_file is None:
+            current = self.status() or {}
+            return current.get('job_id'), False
+
+        job_id = uuid.uuid4().hex[:12]
+        status = {
+            'job_id': job_id,
+            'state': 'running',
+            'started_at': time.time(),
+            'finished_at': None,
+            'symbols': 0,
+            'to_update': 0,
+            'done': 0,
+            'errors': 0,
+            'eta_seconds': None,
+            'error': None,
+        }
+        atomic_write_json(self.status_path, status)
+
+        thread = threading.Thread(target=self._run, args=(lock_file, status, pipeline_kwargs), daemon=True)
+        thread.start()
+        return job_id, True
+
+    def _run(self, lock_file, status, pipeline_kwargs):
+        last_write = [0.0]
+
+        def progress(stats):
+            for key in ('symbols', 'to_update', 'done', 'errors'):
+                status[key] = stats[key]
+            elapsed = time.time() - status['started_at']
+            remaining = status['to_update'] - status['done']
+            if status['done'] and remaining > 0:
+                status['eta_seconds'] = round(elapsed / status['done'] * remaining, 1)
+            now = time.monotonic()
+            if now - last_write[0] >= STATUS_WRITE_INTERVAL:
+                last_write[0] = now
+                atomic_write_json(self.status_path, status)
+
+        try:
+            stats = self.run_pipeline(progress=progress, **pipeline_kwargs) or {}
+            for key in ('symbols', 'to_update', 'done', 'errors'):
+                status[key] = stats.get(key, status[key])
+            status['state'] = 'done'
+        except Exception as e:
+            status['state'] = 'failed'
+            status['error'] = str(e)
+        finally:
+            status['finished_at'] = time.time()
+            status['eta_seconds'] = 0 if status['state'] == 'done' else None
+            atomic_write_json(self.status_path, status)
+            self._release(lock_file)
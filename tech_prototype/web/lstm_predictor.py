@@ -14,6 +14,7 @@ from sklearn.preprocessing import MinMaxScaler
 import tensorflow as tf
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+from store import OHLCVStore
 
 # Suppress TensorFlow warnings for cleaner output
 tf.get_logger().setLevel('ERROR')
@@ -152,18 +153,11 @@ class LSTMPredictor:
         Returns:
             DataFrame со историски податоци
         """
-        # Конвертирање на симбол во формат на фајл
-        coin_file = f"{symbol}.json"
-        filepath = os.path.join(self.data_dir, coin_file)
+        df = OHLCVStore(self.data_dir).read(symbol)
         
-        if not os.path.exists(filepath):
+        if df is None or df.empty:
             raise FileNotFoundError(f"Податоците за {symbol} не постојат")
         
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-        
-        df = pd.DataFrame(data)
-        df['Date'] = pd.to_datetime(df['Date'])
         df = df.sort_values('Date').reset_index(drop=True)
         
         # Пополнување на празни вредности
@@ -0,0 +1,156 @@
+"""
+In-memory symbol search for the index page and the typeahead endpoint.
+
+SymbolIndex is built from the market snapshot (plus coin names from the
+universe file) and rebuilt when the snapshot changes. Prefix queries walk a
+trie whose nodes hold document ids already ordered by dollar volume, so the
+top-k is a slice. Substring queries scan the shortest trigram posting list
+in rank order and stop after k hits. Results are ranked exact match, then
+symbol prefix, then name prefix, then substring.
+"""
+import os
+import threading
+
+
+def load_names(path):
+    """Read {symbol: name} from a universe file ("SYMBOL[,Name]" lines, '#' comments)."""
+    names = {}
+    if not path or not os.path.exists(path):
+        return names
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            symbol, _, name = line.partition(',')
+            if name.strip():
+                names[symbol.strip()] = name.strip()
+    return names
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolIndex:
+    def __init__(self, coins, names=None):
+        """`coins` is the snapshot {symbol: row}; `names` an optional {symbol: name}."""
+        names = names or {}
+        # Document ids are positions in this list, ordered by dollar volume.
+        self.symbols = sorted(
+            coins,
+            key=lambda s: (-(coins[s].get('volume') or 0) * (coins[s].get('close') or 0), s)
+        )
+        self.names = [names.get(symbol, '') for symbol in self.symbols]
+        self._symbol_keys = [symbol.lower() for symbol in self.symbols]
+        self._name_keys = [name.lower() for name in self.names]
+
+        self._symbol_trie = {}
+        self._name_trie = {}
+        self._trigrams = {}
+        for doc_id, (symbol_key, name_key) in enumerate(zip(self._symbol_keys, self._name_keys)):
+            self._insert(self._symbol_trie, symbol_key, doc_id)
+            for word in set(name_key.split()):
+                self._insert(self._name_trie, word, doc_id)
+            for gram in trigrams(symbol_key) | trigrams(name_key):
+                self._trigrams.setdefault(gram, []).append(doc_id)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @staticmethod
+    def _insert(trie, key, doc_id):
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+            ids = node.setdefault('', [])
+            # Ids arrive in rank order, but a word repeated in one name must not duplicate.
+            if not ids or ids[-1] != doc_id:
+                ids.append(doc_id)
+
+    @staticmethod
+    def _prefix(trie, key):
+        node = trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get('', [])
+
+    def _substring(self, query):
+        """Yield matching ids in rank order; every match contains all trigrams of the query."""
+        if len(query) < 3:
+            candidates = range(len(self.symbols))
+        else:
+            candidates = min((self._trigrams.get(gram, []) for gram in trigrams(query)), key=len)
+        for doc_id in candidates:
+            if query in self._symbol_keys[doc_id] or query in self._name_keys[doc_id]:
+                yield doc_id
+
+    def search(self, query, limit=10):
+        """Return up to `limit` (all when None) matching symbols, best first."""
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+
+        seen = set()
+        results = []
+
+        def take(doc_ids):
+            for doc_id in doc_ids:
+                if limit is not None and len(results) >= limit:
+                    return
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    results.append(self.symbols[doc_id])
+
+        exact = self._prefix(self._symbol_trie, query)
+        take(doc_id for doc_id in exact if self._symbol_keys[doc_id] == query)
+        take(exact)
+        take(self._prefix(self._name_trie, query))
+        if limit is None or len(results) < limit:
+            take(self._substring(query))
+        return results
+
+
+class SearchService:
+    """Keeps a SymbolIndex in sync with the market snapshot."""
+
+    def __init__(self, snapshot, names_path=None):
+        self.snapshot = snapshot
+        self.names_path = names_path
+        self._current = None  # (coins, SymbolIndex, {symbol: name}), swapped as a whole
+        self._lock = threading.Lock()
+
+    def index(self):
+        """
+        The index for the current snapshot. Only one thread builds it; while a
+        newer snapshot is being indexed, other requests keep the previous index
+        instead of waiting (they only wait when there is none yet).
+        """
+        coins = self.snapshot.coins()
+        current = self._current
+        # The snapshot hands out the same dict until its file changes.
+        if current is not None and current[0] is coins:
+            return current[1]
+        if not self._lock.acquire(blocking=current is None):
+            return current[1]
+        try:
+            current = self._current
+            if current is None or current[0] is not coins:
+                index = SymbolIndex(coins, load_names(self.names_path))
+                current = self._current = (coins, index, dict(zip(index.symbols, index.names)))
+            return current[1]
+        finally:
+            self._lock.release()
+
+    def warm(self):
+        """Build the index in the background so the first search does not pay for it."""
+        threading.Thread(target=self.index, daemon=True, name="search-index").start()
+
+    def search(self, query, limit=10):
+        return self.index().search(query, limit)
+
+    def name(self, symbol):
+        self.index()
+        return self._current[2].get(symbol, '')
@@ -0,0 +1,240 @@
+"""
+HTTP clients for the TA, FA and LSTM microservices.
+
+Each ServiceClient owns one requests.Session with a keep-alive connection
+pool, so repeated calls reuse TCP/TLS connections instead of paying the
+setup every time. On top of that it adds:
+
+  * a default timeout per service (callers may still pass their own),
+  * a circuit breaker: after `failure_threshold` consecutive failures
+    (connection errors, timeouts, FAILURE_STATUSES) calls fail immediately with
+    CircuitOpenError for `reset_timeout` seconds, then a single trial call
+    decides whether the service is back,
+  * optional hedging of idempotent calls: when a call marked `hedge=True`
+    has not answered after `hedge_after` seconds, a second identical
+    request is sent and whichever answers first wins,
+  * per-endpoint latency histograms, exposed through metrics().
+"""
+import time
+import bisect
+import threading
+import concurrent.futures
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upper bounds of the latency histogram buckets, in milliseconds (the last bucket is open).
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Responses that mean the service itself is failing. Other statuses, such as the 503
+# of a TA service without a data store, are answers and do not trip the breaker.
+FAILURE_STATUSES = {500, 502, 504}
+
+# Threads that send hedged requests; shared by all clients.
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="service-hedge")
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a service's circuit is open."""
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max_ms for the open bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 1) if self.count else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'max_ms': round(self.max_ms, 1),
+            'buckets': {
+                (f"le_{bound}" if i < len(self.bounds) else "inf"): n
+                for i, (bound, n) in enumerate(zip(self.bounds + [None], self.counts))
+            },
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.stats = {'opens': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_timeout:
+                # Let exactly one trial call through.
+                self.state = 'half_open'
+                return True
+            if self.state == 'closed':
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.stats['opens'] += 1
+                self.state = 'open'
+                self.opened_at = self.clock()
+
+    def release(self):
+        """The call said nothing about the service; a half-open trial is handed to the next caller."""
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+                self.opened_at = self.clock() - self.reset_timeout
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, state=self.state, failures=self.failures)
+
+
+class ServiceClient:
+    def __init__(self, name, base_url, timeout=20, pool_size=16, failure_threshold=5,
+                 reset_timeout=30.0, hedge_after=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        # No transport retries: the breaker and the callers' fallbacks decide what a failure means.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._histograms = {}  # endpoint -> LatencyHistogram
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'failures': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def request(self, method, path, timeout=None, endpoint=None, hedge=False, probe=False, **kwargs):
+        """
+        Send `method` to base_url + path and return the requests.Response.
+
+        `endpoint` labels the latency histogram (defaults to `path`; pass a
+        template such as "/analyze/{symbol}" for parameterised paths). `hedge`
+        marks the call as safe to send twice. `probe` bypasses an open circuit
+        (wake-up pings) but its outcome still updates the breaker.
+        """
+        if not probe and not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} service circuit is open")
+
+        url = self.base_url + path
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        try:
+            if hedge and self.hedge_after is not None:
+                response = self._hedged(method, url, timeout, kwargs)
+            else:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self._record(endpoint or path, started, failed=True)
+            raise
+        except Exception:
+            # Not the service's fault (bad arguments, body encoding): latency only.
+            self._record(endpoint or path, started, failed=None)
+            raise
+        self._record(endpoint or path, started, failed=response.status_code in FAILURE_STATUSES)
+        return response
+
+    def _hedged(self, method, url, timeout, kwargs):
+        send = lambda: self.session.request(method, url, timeout=timeout, **kwargs)
+        first = _hedge_pool.submit(send)
+        try:
+            return first.result(timeout=self.hedge_after)
+        except concurrent.futures.TimeoutError:
+            pass
+
+        with self._lock:
+            self.stats['hedged'] += 1
+        second = _hedge_pool.submit(send)
+        futures = [first, second]
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            if future is second:
+                with self._lock:
+                    self.stats['hedge_wins'] += 1
+            # Release the loser's connection once it finishes.
+            for other in futures:
+                if other is not future:
+                    other.add_done_callback(lambda f: f.exception() is None and f.result().close())
+            return future.result()
+        raise error
+
+    def _record(self, endpoint, started, failed):
+        """`failed` is True/False for the breaker, None to leave it alone."""
+        ms = (time.perf_counter() - started) * 1000
+        if failed is None:
+            self.breaker.release()
+        elif failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        with self._lock:
+            self.stats['requests'] += 1
+            if failed:
+                self.stats['failures'] += 1
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = LatencyHistogram()
+            histogram.record(ms)
+
+    def metrics(self):
+        with self._lock:
+            endpoints = {endpoint: h.summary() for endpoint, h in self._histograms.items()}
+            stats = dict(self.stats)
+        return dict(
+            stats,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            hedge_after=self.hedge_after,
+            breaker=self.breaker.metrics(),
+            endpoints=endpoints,
+        )
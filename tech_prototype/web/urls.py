@@ -5,4 +5,9 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('coin/<str:symbol>/', views.detail, name='detail'),
     path('refresh-data/', views.refresh_database, name='refresh_data'),
+    path('refresh-data/status/', views.refresh_status, name='refresh_status'),
+    path('signals/', views.signals, name='signals'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/history/<str:symbol>/', views.history_api, name='history_api'),
 ]
\ No newline at end of file
@@ -1,27 +1,67 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import JsonResponse
 import os
 import sys
-import requests
 from .facade import CryptoMarketFacade, wake_up_services_async, get_service_status
 
 BASE_DIR_OF_DJANGO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR_OF_DJANGO)
 
-DATA_DIR = os.path.join(BASE_DIR_OF_DJANGO, '..', 'data')
-DATA_DIR = os.path.abspath(DATA_DIR)
+# Same data directory as the pipeline, including the CRYPTO_DATA_DIR override
+from config import DATA_DIR
 
 # Instantiate Facade
 market_facade = CryptoMarketFacade(DATA_DIR)
 
 def refresh_database(request):
     try:
-        market_facade.refresh_database()
-        messages.success(request, "Database successfully updated! 🚀")
+        job_id, started = market_facade.refresh_database()
+        if started:
+            messages.success(request, f"Database update started in the background (job {job_id}). 🚀")
+        else:
+            messages.warning(request, f"A database update is already running (job {job_id}).")
     except Exception as e:
         messages.error(request, f"Error: {e}")
     return redirect('index')
 
+def refresh_status(request):
+    status = market_facade.refresh_status(request.GET.get('job'))
+    if status is None:
+        return JsonResponse({'state': 'unknown'}, status=404)
+    return JsonResponse(status)
+
+def search_api(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+    return JsonResponse({'query': query, 'results': market_facade.search_coins(query, limit)})
+
+def history_api(request, symbol):
+    timeframe = request.GET.get('timeframe', '1m')
+    try:
+        before = int(request.GET['before']) if request.GET.get('before') else None
+        limit = max(1, min(int(request.GET.get('limit', 50)), 500))
+    except ValueError:
+        return JsonResponse({'error': 'before and limit must be integers'}, status=400)
+    page = market_facade.get_history_page(symbol, timeframe, before, limit)
+    if page is None:
+        return JsonResponse({'error': f'No data for {symbol}'}, status=404)
+    return JsonResponse(dict(page, symbol=symbol, timeframe=timeframe))
+
+def signals(request):
+    wake_up_services_async()
+    timeframes = ['1d', '1w', '1m']
+    coins = market_facade.compute_all_coin_signals(timeframes)
+    for coin in coins:
+        coin['signal_list'] = [coin['signals'].get(tf, 'N/A') for tf in timeframes]
+    return render(request, 'signals.html', {'coins': coins, 'timeframes': timeframes})
+
+def metrics(request):
+    return JsonResponse(market_facade.get_metrics())
+
 def index(request):
     # Wake up TA and FA services in background (non-blocking)
     # Services will be ready by the time user clicks a coin
@@ -39,7 +79,8 @@ def index(request):
     return render(request, 'index.html', {
         'coins': display_coins,
         'query': query or '',
-        'title_text': title_text
+        'title_text': title_text,
+        'total_count': market_facade.count_coins()
     })
 
 def detail(request, symbol):
@@ -47,8 +88,15 @@ def detail(request, symbol):
     
     print(f"DEBUG: detail() called for {symbol}, timeframe={timeframe}", flush=True)
     
+    # LSTM Предвидување - called together with the TA/FA services under one page budget.
+    # The view stays sync for the WSGI workers; get_coin_details runs the fan-out on its own loop.
+    predict_symbol = request.GET.get('predict_symbol')
+    predict_date = request.GET.get('predict_date')
+    
     try:
-        context, error = market_facade.get_coin_details(symbol, timeframe)
+        context, error = market_facade.get_coin_details(
+            symbol, timeframe, predict_symbol, predict_date
+        )
         print(f"DEBUG: get_coin_details returned, error={error}", flush=True)
     except Exception as e:
         import traceback
@@ -66,43 +114,6 @@ def detail(request, symbol):
             'service_status': get_service_status()
         })
     
-    # LSTM Предвидување - Call external service
-    ai_prediction_result = None
-    ai_error = None
-    
-    predict_symbol = request.GET.get('predict_symbol')
-    predict_date = request.GET.get('predict_date')
-    
-    if predict_symbol and predict_date:
-        try:
-            # Get LSTM service URL from environment variable
-            lstm_url = os.environ.get('LSTM_SERVICE_URL', 'http://localhost:7860')
-            
-            # Call external LSTM service via HTTP (HuggingFace can be slow)
-            response = requests.post(
-                f"{lstm_url}/predict",
-                json={
-                    "symbol": predict_symbol,
-                    "target_date": predict_date
-                },
-                timeout=300  # 5 minutes for HuggingFace Space cold start + model loading
-            )
-            
-            if response.status_code == 200:
-                ai_prediction_result = response.json()
-            else:
-                ai_error = f"LSTM Service Error: {response.status_code} - {response.text}"
-            
-        except requests.exceptions.Timeout:
-            ai_error = "LSTM prediction took too long (HuggingFace Space may be sleeping). Please try again in a moment."
-        except requests.exceptions.ConnectionError:
-            ai_error = "Cannot connect to LSTM service. Please try again later."
-        except Exception as e:
-            ai_error = str(e)
-    
-    # Додавање на LSTM резултати во context
-    context['ai_prediction_result'] = ai_prediction_result
-    context['ai_error'] = ai_error
     context['service_status'] = get_service_status()
         
     # Validating context data before render
@@ -0,0 +1,299 @@
+"""
+NumPy kernels for the primitive ops in strategies.py ("numpy" backend).
+
+Every op takes and returns contiguous float64 arrays, allocates its output
+once and works on whole arrays:
+
+  * rolling ops (SMA, WMA, std, max, min, MAD) reduce a zero-copy
+    sliding_window_view of the input in one pass;
+  * recursive ops (EMA, Wilder smoothing, ADX's running sums) are linear
+    recurrences y[t] = decay * y[t-1] + gain * x[t], evaluated in blocks of
+    64 bars: one triangular matrix product gives every block's response
+    from a zero state, then the carried state is added block by block.
+    When numba is installed (and TA_JIT is not 0) a compiled sequential
+    loop is used instead.
+
+Results match the "ta" backend to floating point rounding (only summation
+order differs), including series with NaN gaps. tests/test_kernels.py
+checks that on synthetic series; `python kernels.py` repeats it on the
+series in DATA_STORE_DIR and times both backends.
+"""
+import os
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+BLOCK = 64
+JIT = njit is not None and os.getenv("TA_JIT", "1") != "0"
+
+
+@lru_cache(maxsize=64)
+def _block_weights(decay, gain):
+    """(W, carry): W[k, j] = gain * decay**(k - j) for j <= k, carry[k] = decay**(k + 1)."""
+    k = np.arange(BLOCK)
+    lag = k[:, None] - k[None, :]
+    weights = np.where(lag >= 0, gain * decay ** np.maximum(lag, 0), 0.0)
+    return weights, decay ** (k + 1)
+
+
+def _recurrence_blocked(x, decay, gain, init):
+    m = len(x)
+    blocks = -(-m // BLOCK)
+    padded = np.zeros(blocks * BLOCK)
+    padded[:m] = x
+    weights, carry = _block_weights(decay, gain)
+    y = padded.reshape(blocks, BLOCK) @ weights.T
+    state = init
+    for row in y:
+        row += carry * state
+        state = row[-1]
+    return y.ravel()[:m]
+
+
+if JIT:
+    @njit(cache=True)
+    def _recurrence_jit(x, decay, gain, init):
+        y = np.empty_like(x)
+        state = init
+        for i in range(len(x)):
+            state = decay * state + gain * x[i]
+            y[i] = state
+        return y
+
+
+def recurrence(x, decay, gain, init):
+    """y[t] = decay * y[t-1] + gain * x[t] with y[-1] = init."""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if not len(x):
+        return x.copy()
+    if JIT:
+        return _recurrence_jit(x, decay, gain, init)
+    return _recurrence_blocked(x, decay, gain, init)
+
+
+def _ewm(x, alpha, min_periods):
+    """
+    pandas ewm(alpha, adjust=False, min_periods).mean(). Like pandas, NaNs
+    hold the previous value, the first value after a gap of g NaNs is
+    weighted (1 - alpha) ** (g + 1) against the old state, and min_periods
+    counts observations rather than bars.
+    """
+    out = np.full(len(x), np.nan)
+    observed = ~np.isnan(x)
+    valid = np.flatnonzero(observed)
+    if not len(valid):
+        return out
+
+    decay = 1 - alpha
+    # Runs of consecutive observations; each run after the first follows a gap.
+    breaks = np.flatnonzero(np.diff(valid) > 1) + 1
+    starts = valid[np.concatenate(([0], breaks))]
+    ends = valid[np.concatenate((breaks - 1, [len(valid) - 1]))] + 1
+    state = x[starts[0]]
+    for i, (lo, hi) in enumerate(zip(starts, ends)):
+        if i:
+            out[ends[i - 1]:lo] = state
+            old = decay ** (lo - ends[i - 1] + 1)
+            state = (old * state + alpha * x[lo]) / (old + alpha)
+        out[lo] = state
+        if hi > lo + 1:
+            out[lo + 1:hi] = recurrence(x[lo + 1:hi], decay, alpha, state)
+            state = out[hi - 1]
+    out[ends[-1]:] = state
+
+    out[np.cumsum(observed) < min_periods] = np.nan
+    return out
+
+
+def _rolling(x, n, reduce):
+    out = np.empty(len(x))
+    out[:n - 1] = np.nan
+    if len(x) >= n:
+        out[n - 1:] = reduce(sliding_window_view(x, n))
+    return out
+
+
+def _shift(x):
+    out = np.empty(len(x))
+    out[0] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+
+def ema(x, n):
+    return _ewm(x, 2 / (n + 1), n)
+
+
+def wilder(x, n):
+    return _ewm(x, 1 / n, n)
+
+
+def sma(x, n):
+    return _rolling(x, n, lambda w: w.mean(axis=1))
+
+
+def wma(x, n):
+    weights = np.array([i * 2 / (n * (n + 1)) for i in range(1, n + 1)])
+    return _rolling(x, n, lambda w: w @ weights)
+
+
+def rolling_std(x, n):
+    return _rolling(x, n, lambda w: w.std(axis=1))
+
+
+def rolling_max(x, n):
+    return _rolling(x, n, lambda w: w.max(axis=1))
+
+
+def rolling_min(x, n):
+    return _rolling(x, n, lambda w: w.min(axis=1))
+
+
+def rolling_mad(x, n):
+    return _rolling(x, n, lambda w: np.abs(w - w.mean(axis=1, keepdims=True)).mean(axis=1))
+
+
+def diff(x):
+    return x - _shift(x)
+
+
+def true_range(high, low, close):
+    prev_close = _shift(close)
+    return np.maximum(high, prev_close) - np.minimum(low, prev_close)
+
+
+def dm_plus(high, low):
+    up = high - _shift(high)
+    down = _shift(low) - low
+    out = np.where((up > down) & (up > 0), up, 0.0)
+    out[0] = np.nan
+    return out
+
+
+def dm_minus(high, low):
+    up = high - _shift(high)
+    down = _shift(low) - low
+    out = np.where((down > up) & (down > 0), down, 0.0)
+    out[0] = np.nan
+    return out
+
+
+def _wilder_sums(values, window, length):
+    """ta's ADX smoothing: first slot sums `window` values, then s - s / window + x; last slot stays 0."""
+    out = np.zeros(length)
+    first = np.flatnonzero(~np.isnan(values))[0]
+    out[0] = values[first:first + window].sum()
+    if length > 2:
+        out[1:length - 1] = recurrence(values[window + 1:window + length - 1], 1 - 1 / window, 1.0, out[0])
+    return out
+
+
+def adx(tr, dm_pos, dm_neg, window):
+    length = len(tr) - (window - 1)
+    if length <= window:
+        raise ValueError(f"ADX needs at least {2 * window} bars")
+    trs = _wilder_sums(tr, window, length)
+    dip_sum = _wilder_sums(dm_pos, window, length)
+    din_sum = _wilder_sums(dm_neg, window, length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dip = np.where(trs != 0, 100 * (dip_sum / trs), 0)
+        din = np.where(trs != 0, 100 * (din_sum / trs), 0)
+        dx = np.where(dip + din != 0, 100 * np.abs((dip - din) / (dip + din)), 0)
+
+    out = np.zeros(len(tr))
+    start = window - 1 + window
+    out[start] = dx[0:window].mean()
+    out[start + 1:] = recurrence(dx[window:length - 1], (window - 1) / window, 1 / window, out[start])
+    return out
+
+
+KERNEL_OPS = {
+    "ema": ema,
+    "sma": sma,
+    "wma": wma,
+    "std": rolling_std,
+    "max": rolling_max,
+    "min": rolling_min,
+    "mad": rolling_mad,
+    "wilder": wilder,
+    "diff": diff,
+    "gain": lambda d: np.where(d > 0, d, 0.0),
+    "loss": lambda d: -np.where(d < 0, d, 0.0),
+    "sub": lambda a, b: a - b,
+    "typical": lambda h, l, c: (h + l + c) / 3.0,
+    "tr": true_range,
+    "dm_plus": dm_plus,
+    "dm_minus": dm_minus,
+    "adx": adx,
+}
+
+
+if __name__ == "__main__":
+    # Parity of the numpy backend against the ta backend on stored series, then a timing comparison.
+    import sys
+    import time
+    import pandas as pd
+    from main import TechnicalAnalysisContext, analyze_frame, _store_reader
+
+    def synthetic(n, seed):
+        rng = np.random.default_rng(seed)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        spread = close * rng.uniform(0.001, 0.03, n)
+        return pd.DataFrame({
+            "Date": pd.date_range("2015-01-01", periods=n, freq="D"),
+            "Open": close * (1 + rng.normal(0, 0.005, n)),
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.uniform(1e3, 1e6, n),
+        })
+
+    series = {}
+    if _store_reader is not None:
+        for symbol in sorted(os.listdir(_store_reader.root)):
+            for timeframe in ["1d", "1w", "1m"]:
+                if os.path.isdir(os.path.join(_store_reader.root, symbol)):
+                    df = _store_reader.read_tail(symbol, timeframe, 10 ** 6)
+                    if df is not None and len(df) >= 50:
+                        series[f"{symbol} {timeframe}"] = df
+
+    reference = TechnicalAnalysisContext(backend="ta")
+    kernels = TechnicalAnalysisContext(backend="numpy")
+    failures = 0
+    worst = 0.0
+    for name, df in series.items():
+        expected = reference.compute_indicators(df)
+        actual = kernels.compute_indicators(df)
+        for strategy in reference._strategies:
+            for col in strategy.columns:
+                a = actual[col].to_numpy(dtype="float64")
+                b = expected[col].to_numpy(dtype="float64")
+                if not np.allclose(a, b, rtol=1e-9, atol=1e-9, equal_nan=True):
+                    print(f"FAIL {name} {col}: max abs diff {np.nanmax(np.abs(a - b)):.3g}")
+                    failures += 1
+                worst = max(worst, float(np.nanmax(np.abs(a - b) / np.maximum(np.abs(b), 1.0), initial=0.0)))
+        signals = [analyze_frame(df.copy(), backend=backend)["overall_signal"] for backend in ("ta", "numpy")]
+        if signals[0] != signals[1]:
+            print(f"FAIL {name}: signal {signals[0]} (ta) vs {signals[1]} (numpy)")
+            failures += 1
+    print(f"{len(series)} series, max relative diff {worst:.2e}, {failures} failures (jit: {JIT})")
+
+    for bars in (250, 1000, 4000):
+        df = synthetic(bars, 0)
+        timings = {}
+        for backend, context in (("ta", reference), ("numpy", kernels)):
+            context.compute_indicators(df)
+            runs = 20
+            started = time.perf_counter()
+            for _ in range(runs):
+                context.compute_indicators(df)
+            timings[backend] = (time.perf_counter() - started) / runs * 1000
+        print(f"{bars:>5} bars: ta {timings['ta']:.2f} ms, numpy {timings['numpy']:.2f} ms "
+              f"({timings['ta'] / timings['numpy']:.1f}x)")
+
+    sys.exit(1 if failures else 0)
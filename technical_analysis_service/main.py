@@ -1,6 +1,13 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import os
+import json
+import asyncio
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, ValidationError
 from typing import List
+import numpy as np
 import pandas as pd
 # from strategies import (
 #     RSIStrategy, MACDStrategy, StochasticStrategy, ADXStrategy,
@@ -11,13 +18,20 @@ try:
         RSIStrategy, MACDStrategy, StochasticStrategy, ADXStrategy,
         CCIStrategy, #MovingAverageStrategy,
         BollingerBandsStrategy, VolumeStrategy,
-        SMAStrategy, EMAStrategy, WMAStrategy
+        SMAStrategy, EMAStrategy, WMAStrategy, STRATEGY_VERSION, SeriesPlan, BACKENDS
     )
 except ImportError:
     from .strategies import (
         RSIStrategy, MACDStrategy, StochasticStrategy, ADXStrategy,
-        CCIStrategy, MovingAverageStrategy, BollingerBandsStrategy, VolumeStrategy
+        CCIStrategy, MovingAverageStrategy, BollingerBandsStrategy, VolumeStrategy,
+        STRATEGY_VERSION, SeriesPlan, BACKENDS
     )
+try:
+    from store_reader import StoreReader, TIMEFRAMES
+    from incremental import IncrementalEngine, iter_candles
+except ImportError:
+    from .store_reader import StoreReader, TIMEFRAMES
+    from .incremental import IncrementalEngine, iter_candles
 app = FastAPI()
 
 class CandleData(BaseModel):
@@ -31,8 +45,46 @@ class CandleData(BaseModel):
 class AnalysisRequest(BaseModel):
     data: List[CandleData]
 
+# Request bodies come in two wire formats:
+#   records:  {"data": [{"Date": "2024-01-01 00:00:00", "Open": ..., ...}, ...]}  (AnalysisRequest)
+#   columnar: {"columns": {"Date": [epoch seconds], "Open": [...], ...}}
+# Columnar bodies are validated per column with numpy instead of per candle with pydantic.
+# /analyze/batch takes {"items": [{"symbol": ..., "timeframe": ..., <either format>}, ...]}.
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# Fewest candles the indicators can be computed on at all (ADX smooths over two 14-bar windows)
+MIN_BARS = 28
+
+# Batches with at least this many series are spread over worker processes
+BATCH_PROCESS_THRESHOLD = int(os.getenv("TA_BATCH_PROCESS_THRESHOLD", "8"))
+BATCH_WORKERS = int(os.getenv("TA_BATCH_WORKERS", str(os.cpu_count() or 1)))
+# Series handed to a worker process per task
+BATCH_CHUNK = 4
+_batch_pool = None
+
+# Indicator backend: "ta" (the ta library on pandas) or "numpy" (kernels.py)
+TA_BACKEND = os.getenv("TA_BACKEND", "ta")
+if TA_BACKEND not in BACKENDS:
+    raise ValueError(f"TA_BACKEND must be one of {list(BACKENDS)}, got {TA_BACKEND!r}")
+
+# Symbol-addressed mode: the service reads candles from the pipeline's store itself
+# (e.g. a shared volume mounted at /data/store) instead of receiving them over HTTP.
+DATA_STORE_DIR = os.getenv("DATA_STORE_DIR")
+# Bars read on top of the strategies' max lookback
+LOOKBACK_MARGIN = int(os.getenv("TA_LOOKBACK_MARGIN", "50"))
+# Warm per-(symbol, timeframe) results, reused until the store generation changes
+SYMBOL_STATE_SIZE = int(os.getenv("TA_SYMBOL_STATE_SIZE", "4096"))
+_store_reader = StoreReader(DATA_STORE_DIR) if DATA_STORE_DIR and os.path.isdir(DATA_STORE_DIR) else None
+# Each entry also holds an IncrementalEngine that has absorbed every closed bar, so new
+# candles are folded in one at a time instead of recomputing the indicators
+_symbol_state = OrderedDict()  # (symbol, timeframe) -> (store version, result, engine)
+_symbol_state_lock = threading.Lock()
+# Bars re-read to catch a warm engine up; a bigger gap rebuilds it from the lookback window
+CATCH_UP_BARS = 64
+# Optional JSON file the engines are saved to on shutdown and restored from on startup
+TA_STATE_FILE = os.getenv("TA_STATE_FILE")
+
 class TechnicalAnalysisContext:
-    def __init__(self):
+    def __init__(self, backend=None):
         self._strategies = [
             RSIStrategy(),
             MACDStrategy(),
@@ -45,11 +97,13 @@ class TechnicalAnalysisContext:
             EMAStrategy(),
             WMAStrategy(),
         ]
+        # Primitive DAG of all strategies: shared series (EMA 20, SMA 20, ...) are computed once.
+        self._plan = SeriesPlan(self._strategies, backend or TA_BACKEND)
+        # Primitives computed by the last compute_indicators call and their timings
+        self.last_report = []
 
     def compute_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        for strategy in self._strategies:
-            df = strategy.compute(df)
+        df, self.last_report = self._plan.compute(df)
         return df
 
     def generate_signal(self, row) -> str:
@@ -63,45 +117,332 @@ class TechnicalAnalysisContext:
             return "SELL"
         return "HOLD"
 
+    def generate_signal_series(self, df: pd.DataFrame):
+        """
+        `generate_signal` for every row of an indicator frame at once.
+        Returns ({strategy name: int8 scores}, int16 total scores, signal per row).
+        """
+        scores = {strategy.name: strategy.evaluate_series(df) for strategy in self._strategies}
+        total = np.sum(list(scores.values()), axis=0, dtype=np.int16)
+        signals = np.where(total >= 3, "BUY", np.where(total <= -3, "SELL", "HOLD"))
+        return scores, total, signals
+
+def analyze_frame(df: pd.DataFrame, report: bool = False, backend: str = None) -> dict:
+    """
+    Run every strategy on a candle DataFrame and explain the signal of the last row.
+    With `report`, the result also lists each primitive computed, its time and its consumers.
+    `backend` overrides TA_BACKEND.
+    """
+    df["Date"] = pd.to_datetime(df["Date"])
+
+    context = TechnicalAnalysisContext(backend)
+    df_indicators = context.compute_indicators(df).dropna()
+
+    if df_indicators.empty:
+        result = {"overall_signal": "N/A", "overall_score": 0, "signals": [],
+                  "strategy_version": STRATEGY_VERSION}
+    else:
+        result = explain_row(context, df_indicators.iloc[-1])
+    if report:
+        result["primitives"] = context.last_report
+    return result
+
+
+def analyze_series(df: pd.DataFrame, bars: int = None, backend: str = None) -> dict:
+    """
+    Per-bar overall signal, score and per-strategy scores over the whole
+    frame (the last `bars` rows when given), for signal overlays and
+    backtests. Warm-up bars whose indicators are not all defined are "N/A"
+    with zero scores, matching the rows `analyze_frame` drops.
+    """
+    if bars is not None and bars <= 0:
+        raise ValueError(f"bars must be positive, got {bars}")
+    df["Date"] = pd.to_datetime(df["Date"])
+
+    context = TechnicalAnalysisContext(backend)
+    df_indicators = context.compute_indicators(df)
+    if bars:
+        df_indicators = df_indicators.iloc[-bars:]
+
+    scores, total, signals = context.generate_signal_series(df_indicators)
+    valid = df_indicators.notna().all(axis=1).to_numpy()
+    signals = np.where(valid, signals, "N/A")
+    total = np.where(valid, total, 0)
+    first_valid = np.flatnonzero(valid)
+
+    return {
+        "dates": df_indicators["Date"].astype("datetime64[s]").astype("int64").tolist(),
+        "overall_signal": signals.tolist(),
+        "overall_score": total.tolist(),
+        "scores": {name: np.where(valid, values, 0).tolist() for name, values in scores.items()},
+        "first_valid": int(first_valid[0]) if len(first_valid) else None,
+        "strategy_version": STRATEGY_VERSION
+    }
+
+
+def explain_row(context: "TechnicalAnalysisContext", row) -> dict:
+    """Overall signal, score and per-strategy explanations for one row of indicator values."""
+    # per-indicator explanations
+    detailed = []
+    total_score = 0
+    for strategy in context._strategies:
+        info = strategy.explain(row)
+        total_score += info["score"]
+        detailed.append(info)
+
+    overall_signal = context.generate_signal(row)
+
+    return {
+        "overall_signal": overall_signal,
+        "overall_score": int(total_score),
+        "signals": detailed,
+        "strategy_version": STRATEGY_VERSION
+    }
+
+
+def frame_from_columns(columns: dict) -> pd.DataFrame:
+    """Build the candle frame from column arrays, converting each column in one go."""
+    missing = [c for c in ["Date"] + OHLCV_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {missing}")
+
+    dates = np.asarray(columns["Date"], dtype=np.int64)
+    frame = {"Date": pd.to_datetime(dates, unit="s")}
+    for c in OHLCV_COLUMNS:
+        values = np.asarray(columns[c], dtype=np.float64)
+        if values.shape != dates.shape:
+            raise ValueError(f"column {c} has {values.size} values, expected {dates.size}")
+        frame[c] = values
+    return pd.DataFrame(frame, copy=False)
+
+
+def frame_from_payload(payload: dict) -> pd.DataFrame:
+    """Accept either the columnar format or the original list of candle records."""
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object")
+    if payload.get("columns") is not None:
+        df = frame_from_columns(payload["columns"])
+    else:
+        request = AnalysisRequest(data=payload.get("data"))
+        df = pd.DataFrame([item.dict() for item in request.data])
+    if len(df) < MIN_BARS:
+        raise ValueError(f"at least {MIN_BARS} candles are needed, got {len(df)}")
+    return df
+
+
+def _analyze_payload(payload: dict) -> dict:
+    """Process-pool entry point: one series in either wire format."""
+    try:
+        return analyze_frame(frame_from_payload(payload))
+    except Exception as e:
+        return {"overall_signal": "Error", "overall_score": 0, "signals": [], "error": str(e),
+                "strategy_version": STRATEGY_VERSION}
+
+
+def _analyze_chunk(items: list) -> list:
+    return [_analyze_payload(item) for item in items]
+
+
+def _get_batch_pool():
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = concurrent.futures.ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _batch_pool
+
+
 @app.post("/analyze")
-async def analyze_data(request: AnalysisRequest):
+async def analyze_data(request: Request):
+    try:
+        df = frame_from_payload(await request.json())
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     try:
-        data_dicts = [item.dict() for item in request.data]
-        df = pd.DataFrame(data_dicts)
+        return analyze_frame(df, report=request.query_params.get("report") in ("1", "true"))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/analyze/series")
+async def analyze_signal_series(request: Request):
+    """
+    Signal history: the body is one series in either wire format, `?bars=N`
+    limits the response to the last N bars (indicators still use all of them).
+    """
+    try:
+        df = frame_from_payload(await request.json())
+        bars = request.query_params.get("bars")
+        if bars is not None:
+            if not bars.isdigit() or int(bars) <= 0:
+                raise ValueError(f"bars must be a positive integer, got {bars!r}")
+            bars = int(bars)
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        return analyze_series(df, bars)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        df["Date"] = pd.to_datetime(df["Date"])
 
-        context = TechnicalAnalysisContext()
-        df_indicators = context.compute_indicators(df).dropna()
+@app.post("/analyze/batch")
+async def analyze_batch(request: Request):
+    """
+    Analyze many (symbol, timeframe) series in one request, each item in
+    either wire format. Large batches are parsed and computed
+    across worker processes; a failing series gets an "Error" result instead
+    of failing the whole batch.
+    """
+    try:
+        payload = await request.json()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not all(isinstance(item, dict) and "symbol" in item for item in items):
+        raise HTTPException(status_code=422, detail="expected {\"items\": [{\"symbol\": ..., ...}]}")
 
-        if df_indicators.empty:
-            return {"overall_signal": "N/A", "overall_score": 0, "signals": []}
+    # The compute runs off the event loop so other requests are served meanwhile.
+    if len(items) >= BATCH_PROCESS_THRESHOLD and BATCH_WORKERS > 1:
+        pool = _get_batch_pool()
+        chunks = [items[i:i + BATCH_CHUNK] for i in range(0, len(items), BATCH_CHUNK)]
+        done = await asyncio.gather(*[asyncio.wrap_future(pool.submit(_analyze_chunk, chunk)) for chunk in chunks])
+        results = [result for chunk in done for result in chunk]
+    else:
+        results = await asyncio.get_running_loop().run_in_executor(None, _analyze_chunk, items)
 
-        last_row = df_indicators.iloc[-1]
+    return {
+        "strategy_version": STRATEGY_VERSION,
+        "results": [
+            dict(result, symbol=item["symbol"], timeframe=item.get("timeframe", "1d"))
+            for item, result in zip(items, results)
+        ]
+    }
 
-        # per-indicator explanations
-        detailed = []
-        total_score = 0
-        for strategy in context._strategies:
-            info = strategy.explain(last_row)
-            total_score += info["score"]
-            detailed.append(info)
 
-        overall_signal = context.generate_signal(last_row)
+@app.get("/analyze/{symbol}")
+def analyze_symbol(symbol: str, timeframe: str = "1d"):
+    """
+    Analyze a symbol straight from the shared data store. Only the bars the
+    strategies need are read, and the result is kept warm per symbol and
+    timeframe until the pipeline writes new candles for it.
+    """
+    if _store_reader is None:
+        raise HTTPException(status_code=503, detail="DATA_STORE_DIR is not configured")
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=422, detail=f"unknown timeframe {timeframe}, expected one of {list(TIMEFRAMES)}")
 
-        return {
-            "overall_signal": overall_signal,
-            "overall_score": int(total_score),
-            "signals": detailed
-        }
+    key = (symbol, timeframe)
+    version = _store_reader.version(symbol, timeframe)
+    with _symbol_state_lock:
+        state = _symbol_state.get(key)
+        if state is not None and state[0] == version:
+            _symbol_state.move_to_end(key)
+            return state[1]
+        # Take the engine out so a concurrent request for the same key cannot advance it too.
+        engine = state[2] if state is not None else None
+        if state is not None:
+            _symbol_state[key] = (state[0], state[1], None)
 
+    try:
+        engine, last = _catch_up(symbol, timeframe, engine)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if engine is None:
+        raise HTTPException(status_code=404, detail=f"no {timeframe} data for {symbol}")
+
+    # The newest bar (open week/month, today's candle) can still change, so it is evaluated, not absorbed.
+    row = engine.peek(last)
+    if any(row[col] != row[col] for col in engine.columns):
+        result = {"overall_signal": "N/A", "overall_score": 0, "signals": [],
+                  "strategy_version": STRATEGY_VERSION}
+    else:
+        result = explain_row(TechnicalAnalysisContext(), row)
+    result = dict(result, symbol=symbol, timeframe=timeframe, bars=engine.bars + 1, last_ts=last["Date"])
+
+    with _symbol_state_lock:
+        _symbol_state[key] = (version, result, engine)
+        _symbol_state.move_to_end(key)
+        while len(_symbol_state) > SYMBOL_STATE_SIZE:
+            _symbol_state.popitem(last=False)
+    return result
+
+
+def _catch_up(symbol, timeframe, engine):
+    """
+    Bring `engine` up to date with the store: absorb every closed bar after
+    engine.last_ts and return (engine, newest candle). Without an
+    engine, or when more than CATCH_UP_BARS arrived since, a new one is warmed
+    on the strategies' lookback window. (None, None) when there is no data.
+    """
+    if engine is not None:
+        df = _store_reader.read_tail(symbol, timeframe, CATCH_UP_BARS)
+        candles = list(iter_candles(df)) if df is not None else []
+        # The read must overlap what the engine has seen, otherwise bars were skipped.
+        if candles and candles[0]["Date"] <= engine.last_ts < candles[-1]["Date"]:
+            new = [candle for candle in candles if candle["Date"] > engine.last_ts]
+            for candle in new[:-1]:
+                engine.update(candle)
+            return engine, new[-1]
+
+    bars = max(strategy.lookback for strategy in TechnicalAnalysisContext()._strategies) + LOOKBACK_MARGIN
+    df = _store_reader.read_tail(symbol, timeframe, bars)
+    if df is None or df.empty:
+        return None, None
+    candles = list(iter_candles(df))
+    engine = IncrementalEngine()
+    for candle in candles[:-1]:
+        engine.update(candle)
+    return engine, candles[-1]
+
+
+@app.on_event("startup")
+def load_symbol_state():
+    if not TA_STATE_FILE or not os.path.exists(TA_STATE_FILE):
+        return
+    try:
+        with open(TA_STATE_FILE, "r") as f:
+            snapshots = json.load(f)
+    except (OSError, ValueError):
+        return
+    with _symbol_state_lock:
+        for key, snapshot in snapshots.items():
+            engine = IncrementalEngine.from_snapshot(snapshot)
+            if engine is not None:
+                # No version/result: the first request catches the engine up with the store.
+                _symbol_state[tuple(key.split("|", 1))] = (None, None, engine)
+
+
+@app.on_event("shutdown")
+def save_symbol_state():
+    if not TA_STATE_FILE:
+        return
+    with _symbol_state_lock:
+        snapshots = {f"{symbol}|{timeframe}": engine.snapshot()
+                     for (symbol, timeframe), (_, _, engine) in _symbol_state.items() if engine is not None}
+    tmp_path = f"{TA_STATE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshots, f)
+    os.replace(tmp_path, TA_STATE_FILE)
+
+
+@app.get("/capabilities")
+def capabilities():
+    """How much history a client needs to send: the last row is final after `max_lookback` bars."""
+    strategies = TechnicalAnalysisContext()._strategies
+    return {
+        "strategy_version": STRATEGY_VERSION,
+        "max_lookback": max(strategy.lookback for strategy in strategies),
+        "strategies": [{"name": strategy.name, "lookback": strategy.lookback} for strategy in strategies],
+        "wire_formats": ["records", "columnar"],
+        "store": _store_reader is not None,
+        "backend": TA_BACKEND,
+    }
 
 
 @app.get("/")
 def read_root():
-    return {"status": "Technical Analysis Service is Running"}
+    return {"status": "Technical Analysis Service is Running", "strategy_version": STRATEGY_VERSION}
 
 @app.get("/health")
 def health_check():
@@ -0,0 +1,166 @@
+"""
+Read-only access to the web app's columnar OHLCV store.
+
+This service is deployed on its own, so it cannot import the pipeline's
+`store.py`; this module reads the same on-disk layout (see
+tech_prototype/store.py) from DATA_STORE_DIR, e.g. a volume shared with the
+pipeline or a local copy:
+
+    <root>/<SYMBOL>/<interval>/header.json
+    <root>/<SYMBOL>/<interval>/base.<generation>/<Column>.npy
+    <root>/<SYMBOL>/<interval>/seg.<generation>.npy
+    <root>/<SYMBOL>/<interval>/<YYYY-MM>/...          (intraday partitions)
+
+Only the trailing bars a caller asks for are copied out of the memory-mapped
+columns. Timeframes use the web app's names: "1m" is one month.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum"
+}
+
+# timeframe -> (stored interval, closed-bucket rollup interval, resample rule)
+TIMEFRAMES = {
+    "1d": ("1d", None, None),
+    "1w": ("1d", "1wk", "W"),
+    "1m": ("1d", "1mo", "ME"),
+    "15m": ("15m", None, None),
+    "1h": ("1h", None, None),
+    "4h": ("1h", None, "4h"),
+}
+
+# Upper bound on the bars in one resample bucket, used to size source reads.
+BARS_PER_BUCKET = {"W": 7, "ME": 31, "4h": 4}
+
+
+def _to_frame(columns):
+    df = pd.DataFrame({col: columns[col] for col in COLUMNS})
+    df.insert(0, "Date", pd.to_datetime(columns["Date"], unit="s"))
+    return df
+
+
+def _resample(df, rule):
+    return df.resample(rule, on="Date").agg(AGGREGATION).dropna().reset_index()
+
+
+class StoreReader:
+    def __init__(self, root):
+        self.root = root
+
+    def _series_dir(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def header(self, symbol, interval):
+        try:
+            with open(os.path.join(self._series_dir(symbol, interval), "header.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def version(self, symbol, timeframe):
+        """Generations of every series a timeframe is built from; changes whenever new candles land."""
+        source, rollup, _ = TIMEFRAMES[timeframe]
+        intervals = [source] + ([rollup] if rollup else [])
+        return tuple((self.header(symbol, interval) or {}).get("generation") for interval in intervals)
+
+    def _tail_series(self, symbol, interval, bars, after=None):
+        """Last `bars` rows (all rows newer than `after` when given) of one flat series."""
+        for _ in range(3):
+            header = self.header(symbol, interval)
+            if header is None:
+                return None
+            series_dir = self._series_dir(symbol, interval)
+            try:
+                base_dir = os.path.join(series_dir, f"base.{header.get('base', header['generation'])}")
+                sources = [{col: np.load(os.path.join(base_dir, f"{col}.npy"), mmap_mode="r")
+                            for col in ["Date"] + COLUMNS}]
+                sources += [np.load(os.path.join(series_dir, name), mmap_mode="r")
+                            for name in header.get("segments", [])]
+            except FileNotFoundError:
+                # The pipeline swapped generations between the header read and the open; retry.
+                continue
+
+            parts = []
+            remaining = bars
+            for source in reversed(sources):
+                dates = source["Date"]
+                if after is not None:
+                    lo = int(np.searchsorted(dates, after, side="right"))
+                else:
+                    lo = max(0, len(dates) - remaining)
+                parts.append({col: np.array(source[col][lo:]) for col in ["Date"] + COLUMNS})
+                remaining -= len(dates) - lo
+                if (after is None and remaining <= 0) or (after is not None and lo > 0):
+                    break
+            parts.reverse()
+            return {col: np.concatenate([p[col] for p in parts]) for col in ["Date"] + COLUMNS}
+        return None
+
+    def _tail(self, symbol, interval, bars, after=None):
+        header = self.header(symbol, interval)
+        if header is None:
+            return None
+        if "partitions" not in header:
+            return self._tail_series(symbol, interval, bars, after)
+
+        # Intraday: walk the monthly partitions from the newest until enough rows are collected.
+        after_key = None
+        if after is not None:
+            after_key = np.datetime64(int(after), "s").astype("datetime64[M]").astype(str)
+        parts = []
+        remaining = bars
+        for key in reversed(header["partitions"]):
+            if after_key is not None and key < after_key:
+                break
+            columns = self._tail_series(symbol, f"{interval}/{key}", remaining, after)
+            if columns is None:
+                continue
+            parts.append(columns)
+            remaining -= len(columns["Date"])
+            if after is None and remaining <= 0:
+                break
+        if not parts:
+            return None
+        parts.reverse()
+        return {col: np.concatenate([p[col] for p in parts]) for col in ["Date"] + COLUMNS}
+
+    def read_tail(self, symbol, timeframe, bars):
+        """The last `bars` candles of `timeframe` as a DataFrame, or None when the symbol is unknown."""
+        source, rollup, rule = TIMEFRAMES[timeframe]
+
+        if rollup and (self.header(symbol, rollup) or {}).get("rows"):
+            # Closed buckets are materialized by the pipeline; only the open one is built here.
+            closed = self._tail(symbol, rollup, bars)
+            last = int(closed["Date"][-1]) if len(closed["Date"]) else None
+            recent = self._tail(symbol, source, 0, after=last) if last is not None else None
+            frames = [_to_frame(closed)]
+            if recent is not None and len(recent["Date"]):
+                frames.append(_resample(_to_frame(recent), rule))
+            return pd.concat(frames, ignore_index=True).tail(bars).reset_index(drop=True)
+
+        if rule:
+            # No rollup series: resample enough source rows. When the read was cut
+            # short, its first bucket may be partial and is dropped.
+            wanted = (bars + 1) * BARS_PER_BUCKET[rule]
+            columns = self._tail(symbol, source, wanted)
+            if columns is None:
+                return None
+            buckets = _resample(_to_frame(columns), rule)
+            if len(columns["Date"]) >= wanted:
+                buckets = buckets.iloc[1:]
+            return buckets.tail(bars).reset_index(drop=True)
+
+        columns = self._tail(symbol, source, bars)
+        if columns is None:
+            return None
+        return _to_frame(columns)
@@ -1,19 +1,211 @@
+import time
+import numpy as np
 import pandas as pd
 import ta
 from abc import ABC, abstractmethod
+try:
+    from kernels import KERNEL_OPS
+except ImportError:
+    from .kernels import KERNEL_OPS
+
+# Bump whenever a strategy is added/removed or its computation or thresholds change.
+# Clients key cached analysis results on it.
+STRATEGY_VERSION = "1"
+
+
+# ---------------------------------------------------------------------------
+# Primitive series
+#
+# Strategies declare the series they need as primitive specs: hashable tuples
+# (op, *args) where an arg is a column name, a number or another spec, e.g.
+# ema(sub(ema("Close", 12), ema("Close", 26)), 9). Equal specs are the same
+# node, so a SeriesPlan over several strategies computes every shared
+# sub-series (EMA 20, SMA 20 of Close, ...) once and hands the same Series
+# to each consumer. Each backend implements every op: "ta" reproduces the
+# `ta` library's indicators exactly on pandas Series, "numpy" runs the
+# array kernels in kernels.py.
+# ---------------------------------------------------------------------------
+
+def ema(source, window): return ("ema", source, window)
+def sma(source, window): return ("sma", source, window)
+def wma(source, window): return ("wma", source, window)
+def rolling_std(source, window): return ("std", source, window)
+def rolling_max(source, window): return ("max", source, window)
+def rolling_min(source, window): return ("min", source, window)
+def rolling_mad(source, window): return ("mad", source, window)
+def wilder(source, window): return ("wilder", source, window)
+def diff(source): return ("diff", source)
+def gain(source): return ("gain", source)
+def loss(source): return ("loss", source)
+def sub(a, b): return ("sub", a, b)
+def typical_price(): return ("typical", "High", "Low", "Close")
+def true_range(): return ("tr", "High", "Low", "Close")
+def dm_plus(): return ("dm_plus", "High", "Low")
+def dm_minus(): return ("dm_minus", "High", "Low")
+def adx(window): return ("adx", true_range(), dm_plus(), dm_minus(), window)
+
+
+def _mad(x):
+    return np.mean(np.abs(x - np.mean(x)))
+
+
+def _wilder_sums(values, window):
+    """ta's ADX smoothing: sum of the first `window` values, then s - s / window + x (last slot left at 0)."""
+    out = np.zeros(len(values) - (window - 1))
+    out[0] = values.dropna().iloc[0:window].sum()
+    values = values.reset_index(drop=True)
+    for i in range(1, len(out) - 1):
+        out[i] = out[i - 1] - (out[i - 1] / float(window)) + values[window + i]
+    return out
+
+
+def _adx(tr, dm_pos, dm_neg, window, index):
+    trs = _wilder_sums(tr, window)
+    dip_sum = _wilder_sums(dm_pos, window)
+    din_sum = _wilder_sums(dm_neg, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dip = np.where(trs != 0, 100 * (dip_sum / trs), 0)
+        din = np.where(trs != 0, 100 * (din_sum / trs), 0)
+        dx = np.where(dip + din != 0, 100 * np.abs((dip - din) / (dip + din)), 0)
+
+    out = np.zeros(len(trs))
+    out[window] = dx[0:window].mean()
+    for i in range(window + 1, len(out)):
+        out[i] = ((out[i - 1] * (window - 1)) + dx[i - 1]) / float(window)
+    return pd.Series(np.concatenate((np.zeros(window - 1), out)), index=index)
+
+
+PRIMITIVE_OPS = {
+    "ema": lambda s, n: ta.trend.EMAIndicator(s, window=n).ema_indicator(),
+    "sma": lambda s, n: ta.trend.SMAIndicator(s, window=n).sma_indicator(),
+    "wma": lambda s, n: ta.trend.WMAIndicator(s, window=n).wma(),
+    "std": lambda s, n: s.rolling(n, min_periods=n).std(ddof=0),
+    "max": lambda s, n: s.rolling(n, min_periods=n).max(),
+    "min": lambda s, n: s.rolling(n, min_periods=n).min(),
+    "mad": lambda s, n: s.rolling(n, min_periods=n).apply(_mad, True),
+    "wilder": lambda s, n: s.ewm(alpha=1 / n, min_periods=n, adjust=False).mean(),
+    "diff": lambda s: s.diff(1),
+    "gain": lambda d: d.where(d > 0, 0.0),
+    "loss": lambda d: -d.where(d < 0, 0.0),
+    "sub": lambda a, b: a - b,
+    "typical": lambda h, l, c: (h + l + c) / 3.0,
+    "tr": lambda h, l, c: pd.Series(np.maximum(h, c.shift(1)) - np.minimum(l, c.shift(1)), index=c.index),
+    "dm_plus": lambda h, l: abs((((h - h.shift(1)) > (l.shift(1) - l)) & ((h - h.shift(1)) > 0)) * (h - h.shift(1))),
+    "dm_minus": lambda h, l: abs((((l.shift(1) - l) > (h - h.shift(1))) & ((l.shift(1) - l) > 0)) * (l.shift(1) - l)),
+    "adx": lambda tr, p, m, n: _adx(tr, p, m, n, tr.index),
+}
+
+
+BACKENDS = {"ta": PRIMITIVE_OPS, "numpy": KERNEL_OPS}
+
+
+def primitive_label(spec) -> str:
+    if isinstance(spec, tuple):
+        return f"{spec[0]}({', '.join(primitive_label(arg) for arg in spec[1:])})"
+    return str(spec)
+
+
+class SeriesPlan:
+    """
+    The primitive DAG of a set of strategies in dependency order, each node
+    listed once with the strategies that use it (directly or as an input).
+    """
+
+    def __init__(self, strategies, backend="ta"):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown TA backend {backend!r}, expected one of {list(BACKENDS)}")
+        self.backend = backend
+        self.strategies = list(strategies)
+        self.order = []
+        self.consumers = {}
+        for strategy in self.strategies:
+            for spec in strategy.primitives.values():
+                self._visit(spec, strategy.name)
+
+    def _visit(self, spec, consumer):
+        if not isinstance(spec, tuple):
+            return
+        first_visit = spec not in self.consumers
+        self.consumers.setdefault(spec, [])
+        if consumer not in self.consumers[spec]:
+            self.consumers[spec].append(consumer)
+        for arg in spec[1:]:
+            self._visit(arg, consumer)
+        if first_visit:
+            self.order.append(spec)
+
+    def evaluate(self, df: pd.DataFrame):
+        """Compute every node once. Returns ({spec: Series}, report rows in evaluation order)."""
+        ops = BACKENDS[self.backend]
+        values = {}
+        report = []
+        columns = {}
+
+        def resolve(arg):
+            if isinstance(arg, tuple):
+                return values[arg]
+            if isinstance(arg, str):
+                if self.backend == "ta":
+                    return df[arg]
+                if arg not in columns:
+                    columns[arg] = np.ascontiguousarray(df[arg].to_numpy(dtype=np.float64))
+                return columns[arg]
+            return arg
+
+        for spec in self.order:
+            started = time.perf_counter()
+            values[spec] = ops[spec[0]](*[resolve(arg) for arg in spec[1:]])
+            report.append({
+                "primitive": primitive_label(spec),
+                "ms": round((time.perf_counter() - started) * 1000, 3),
+                "used_by": self.consumers[spec],
+            })
+        return values, report
+
+    def compute(self, df: pd.DataFrame):
+        """Add every strategy's columns to a copy of `df`. Returns (frame, report)."""
+        values, report = self.evaluate(df)
+        df = df.copy()
+        # Division by a zero range (flat windows) yields inf/NaN like the ta backend, without warnings.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for strategy in self.strategies:
+                series = {alias: values[spec] if isinstance(spec, tuple) else df[spec]
+                          for alias, spec in strategy.primitives.items()}
+                for column, value in strategy.combine(series, df).items():
+                    df[column] = value
+        return df, report
+
 
 class TechnicalIndicatorStrategy(ABC):
     name: str = "UNKNOWN"
     columns: list[str] = []
+    # Bars of history `compute` needs before the value on the last row is final.
+    # Recursive (EMA/Wilder-smoothed) indicators never fully forget their start, so
+    # for them this is the point where the last value is within ~1e-4 of a full-history run.
+    lookback: int = 0
+    # alias -> primitive spec (or column name) handed to `combine`
+    primitives: dict = {}
 
     @abstractmethod
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+    def combine(self, series: dict, df: pd.DataFrame) -> dict:
+        """Build the strategy's columns ({column: Series}) from its primitives."""
         pass
 
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        df, _ = SeriesPlan([self]).compute(df)
+        return df
+
     @abstractmethod
     def evaluate(self, row) -> int:
         pass
 
+    def evaluate_series(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        `evaluate` for every row at once as an int8 array. Strategies override
+        this with array comparisons; the fallback calls `evaluate` row by row.
+        """
+        return np.array([self.evaluate(row) for _, row in df.iterrows()], dtype=np.int8)
+
     def signal_from_score(self, score: int) -> str:
         if score > 0:
             return "BUY"
@@ -44,10 +236,15 @@ class TechnicalIndicatorStrategy(ABC):
 class RSIStrategy(TechnicalIndicatorStrategy):
     name = "RSI"
     columns = ["RSI"]
+    lookback = 150
+    primitives = {
+        "up": wilder(gain(diff("Close")), 14),
+        "down": wilder(loss(diff("Close")), 14),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["RSI"] = ta.momentum.RSIIndicator(df["Close"]).rsi()
-        return df
+    def combine(self, series, df):
+        up, down = series["up"], series["down"]
+        return {"RSI": pd.Series(np.where(down == 0, 100, 100 - (100 / (1 + up / down))), index=df.index)}
 
     def evaluate(self, row) -> int:
         if row["RSI"] < 30:
@@ -56,31 +253,44 @@ class RSIStrategy(TechnicalIndicatorStrategy):
             return -1
         return 0
 
+    def evaluate_series(self, df):
+        rsi = df["RSI"].to_numpy()
+        return np.where(rsi < 30, 1, np.where(rsi > 70, -1, 0)).astype(np.int8)
+
 
 class MACDStrategy(TechnicalIndicatorStrategy):
     name = "MACD"
     columns = ["MACD", "MACD_SIGNAL"]
+    lookback = 150
+    primitives = {
+        "macd": sub(ema("Close", 12), ema("Close", 26)),
+        "signal": ema(sub(ema("Close", 12), ema("Close", 26)), 9),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        macd = ta.trend.MACD(df["Close"])
-        df["MACD"] = macd.macd()
-        df["MACD_SIGNAL"] = macd.macd_signal()
-        return df
+    def combine(self, series, df):
+        return {"MACD": series["macd"], "MACD_SIGNAL": series["signal"]}
 
     def evaluate(self, row) -> int:
         if row["MACD"] > row["MACD_SIGNAL"]:
             return 1
         return -1
 
+    def evaluate_series(self, df):
+        return np.where(df["MACD"].to_numpy() > df["MACD_SIGNAL"].to_numpy(), 1, -1).astype(np.int8)
+
 
 class StochasticStrategy(TechnicalIndicatorStrategy):
     name = "Stochastic"
     columns = ["STOCH"]
+    lookback = 14
+    primitives = {
+        "low": rolling_min("Low", 14),
+        "high": rolling_max("High", 14),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        stoch = ta.momentum.StochasticOscillator(df["High"], df["Low"], df["Close"])
-        df["STOCH"] = stoch.stoch()
-        return df
+    def combine(self, series, df):
+        low, high = series["low"], series["high"]
+        return {"STOCH": 100 * (df["Close"] - low) / (high - low)}
 
     def evaluate(self, row) -> int:
         if row["STOCH"] < 20:
@@ -89,15 +299,22 @@ class StochasticStrategy(TechnicalIndicatorStrategy):
             return -1
         return 0
 
+    def evaluate_series(self, df):
+        stoch = df["STOCH"].to_numpy()
+        return np.where(stoch < 20, 1, np.where(stoch > 80, -1, 0)).astype(np.int8)
+
 
 class ADXStrategy(TechnicalIndicatorStrategy):
     name = "ADX + EMA20 trend"
     columns = ["ADX", "EMA_20"]
+    lookback = 200
+    primitives = {
+        "adx": adx(14),
+        "ema": ema("Close", 20),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["ADX"] = ta.trend.ADXIndicator(df["High"], df["Low"], df["Close"]).adx()
-        df["EMA_20"] = ta.trend.EMAIndicator(df["Close"], window=20).ema_indicator()
-        return df
+    def combine(self, series, df):
+        return {"ADX": series["adx"], "EMA_20": series["ema"]}
 
     def evaluate(self, row) -> int:
         if row["ADX"] > 25:
@@ -107,14 +324,23 @@ class ADXStrategy(TechnicalIndicatorStrategy):
                 return -1
         return 0
 
+    def evaluate_series(self, df):
+        trend = np.where(df["Close"].to_numpy() > df["EMA_20"].to_numpy(), 1, -1)
+        return np.where(df["ADX"].to_numpy() > 25, trend, 0).astype(np.int8)
+
 
 class CCIStrategy(TechnicalIndicatorStrategy):
     name = "CCI"
     columns = ["CCI"]
+    lookback = 20
+    primitives = {
+        "tp": typical_price(),
+        "mean": sma(typical_price(), 20),
+        "mad": rolling_mad(typical_price(), 20),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["CCI"] = ta.trend.CCIIndicator(df["High"], df["Low"], df["Close"]).cci()
-        return df
+    def combine(self, series, df):
+        return {"CCI": (series["tp"] - series["mean"]) / (0.015 * series["mad"])}
 
     def evaluate(self, row) -> int:
         if row["CCI"] < -100:
@@ -123,55 +349,74 @@ class CCIStrategy(TechnicalIndicatorStrategy):
             return -1
         return 0
 
+    def evaluate_series(self, df):
+        cci = df["CCI"].to_numpy()
+        return np.where(cci < -100, 1, np.where(cci > 100, -1, 0)).astype(np.int8)
+
 
 
 
 class SMAStrategy(TechnicalIndicatorStrategy):
     name = "SMA (20)"
     columns = ["SMA_20"]
+    lookback = 20
+    primitives = {"sma": sma("Close", 20)}
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["SMA_20"] = ta.trend.SMAIndicator(df["Close"], window=20).sma_indicator()
-        return df
+    def combine(self, series, df):
+        return {"SMA_20": series["sma"]}
 
     def evaluate(self, row) -> int:
         return 1 if row["Close"] > row["SMA_20"] else -1
 
+    def evaluate_series(self, df):
+        return np.where(df["Close"].to_numpy() > df["SMA_20"].to_numpy(), 1, -1).astype(np.int8)
+
 
 class EMAStrategy(TechnicalIndicatorStrategy):
     name = "EMA (20)"
     columns = ["EMA_20"]
+    lookback = 100
+    primitives = {"ema": ema("Close", 20)}
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["EMA_20"] = ta.trend.EMAIndicator(df["Close"], window=20).ema_indicator()
-        return df
+    def combine(self, series, df):
+        return {"EMA_20": series["ema"]}
 
     def evaluate(self, row) -> int:
         return 1 if row["Close"] > row["EMA_20"] else -1
 
+    def evaluate_series(self, df):
+        return np.where(df["Close"].to_numpy() > df["EMA_20"].to_numpy(), 1, -1).astype(np.int8)
+
 
 class WMAStrategy(TechnicalIndicatorStrategy):
     name = "WMA (20)"
     columns = ["WMA_20"]
+    lookback = 20
+    primitives = {"wma": wma("Close", 20)}
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["WMA_20"] = ta.trend.WMAIndicator(df["Close"], window=20).wma()
-        return df
+    def combine(self, series, df):
+        return {"WMA_20": series["wma"]}
 
     def evaluate(self, row) -> int:
         return 1 if row["Close"] > row["WMA_20"] else -1
 
+    def evaluate_series(self, df):
+        return np.where(df["Close"].to_numpy() > df["WMA_20"].to_numpy(), 1, -1).astype(np.int8)
+
 
 
 class BollingerBandsStrategy(TechnicalIndicatorStrategy):
     name = "Bollinger Bands"
     columns = ["BB_HIGH", "BB_LOW"]
+    lookback = 20
+    primitives = {
+        "mavg": sma("Close", 20),
+        "std": rolling_std("Close", 20),
+    }
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        bb = ta.volatility.BollingerBands(df["Close"])
-        df["BB_HIGH"] = bb.bollinger_hband()
-        df["BB_LOW"] = bb.bollinger_lband()
-        return df
+    def combine(self, series, df):
+        mavg, std = series["mavg"], series["std"]
+        return {"BB_HIGH": mavg + 2 * std, "BB_LOW": mavg - 2 * std}
 
     def evaluate(self, row) -> int:
         if row["Close"] < row["BB_LOW"]:
@@ -180,16 +425,25 @@ class BollingerBandsStrategy(TechnicalIndicatorStrategy):
             return -1
         return 0
 
+    def evaluate_series(self, df):
+        close = df["Close"].to_numpy()
+        return np.where(close < df["BB_LOW"].to_numpy(), 1,
+                        np.where(close > df["BB_HIGH"].to_numpy(), -1, 0)).astype(np.int8)
+
 
 class VolumeStrategy(TechnicalIndicatorStrategy):
     name = "Volume vs SMA20"
     columns = ["VOL_SMA_20"]
+    lookback = 20
+    primitives = {"sma": sma("Volume", 20)}
 
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["VOL_SMA_20"] = ta.trend.SMAIndicator(df["Volume"], window=20).sma_indicator()
-        return df
+    def combine(self, series, df):
+        return {"VOL_SMA_20": series["sma"]}
 
     def evaluate(self, row) -> int:
         if row["Volume"] > row["VOL_SMA_20"]:
             return 1
         return 0
+
+    def evaluate_series(self, df):
+        return np.where(df["Volume"].to_numpy() > df["VOL_SMA_20"].to_numpy(), 1, 0).astype(np.int8)
@@ -0,0 +1,28 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# The service modules are imported flat (`from strategies import ...`), as uvicorn runs them.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_candles(n, seed):
+    """Random-walk daily candles with a realistic spread."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = close * rng.uniform(0.001, 0.03, n)
+    return pd.DataFrame({
+        "Date": pd.date_range("2015-01-01", periods=n, freq="D"),
+        "Open": close * (1 + rng.normal(0, 0.005, n)),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.uniform(1e3, 1e6, n),
+    })
+
+
+@pytest.fixture
+def candles():
+    return make_candles
@@ -0,0 +1,64 @@
+"""Parity of the numpy kernels ("numpy" backend) with the ta library ("ta" backend)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import kernels
+from main import TechnicalAnalysisContext, analyze_frame
+from strategies import PRIMITIVE_OPS
+
+
+def loop_recurrence(x, decay, gain, init):
+    y = np.empty(len(x))
+    state = init
+    for i, value in enumerate(x):
+        state = decay * state + gain * value
+        y[i] = state
+    return y
+
+
+@pytest.mark.parametrize("length", [0, 1, kernels.BLOCK - 1, kernels.BLOCK, kernels.BLOCK + 1, 1000])
+@pytest.mark.parametrize("decay, gain, init", [(1 - 2 / 21, 2 / 21, 5.0), (13 / 14, 1.0, 120.0), (0.5, 0.5, 0.0)])
+def test_recurrence_matches_sequential_loop(length, decay, gain, init):
+    x = np.random.default_rng(length).normal(0, 1, length)
+    np.testing.assert_allclose(kernels._recurrence_blocked(x, decay, gain, init),
+                               loop_recurrence(x, decay, gain, init), rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(kernels.recurrence(x, decay, gain, init),
+                               loop_recurrence(x, decay, gain, init), rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize("op, window", [("ema", 9), ("ema", 12), ("ema", 20), ("ema", 26), ("wilder", 14)])
+@pytest.mark.parametrize("gap_rate", [0.0, 0.05, 0.4])
+def test_ewm_matches_ta_with_gaps(op, window, gap_rate):
+    rng = np.random.default_rng(window)
+    x = 50 + np.cumsum(rng.normal(0, 1, 500))
+    x[rng.random(500) < gap_rate] = np.nan
+    x[:7] = np.nan  # leading NaNs, as after diff() and shifted inputs
+
+    expected = PRIMITIVE_OPS[op](pd.Series(x), window).to_numpy(dtype="float64")
+    actual = kernels.KERNEL_OPS[op](x, window)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("length, seed", [(28, 0), (29, 1), (60, 2), (250, 3), (2000, 4), (2000, 5)])
+def test_backends_agree_on_every_indicator(candles, length, seed):
+    df = candles(length, seed)
+    expected = TechnicalAnalysisContext(backend="ta").compute_indicators(df.copy())
+    actual = TechnicalAnalysisContext(backend="numpy").compute_indicators(df.copy())
+    for strategy in TechnicalAnalysisContext()._strategies:
+        for col in strategy.columns:
+            np.testing.assert_allclose(actual[col].to_numpy(dtype="float64"),
+                                       expected[col].to_numpy(dtype="float64"),
+                                       rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=col)
+
+    ta_result = analyze_frame(df.copy(), backend="ta")
+    numpy_result = analyze_frame(df.copy(), backend="numpy")
+    assert numpy_result["overall_signal"] == ta_result["overall_signal"]
+    assert numpy_result["overall_score"] == ta_result["overall_score"]
+
+
+def test_adx_rejects_series_shorter_than_two_windows():
+    x = np.ones(27)
+    with pytest.raises(ValueError):
+        kernels.adx(x, x, x, 14)
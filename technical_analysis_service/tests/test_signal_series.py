@@ -0,0 +1,68 @@
+"""The vectorized signal history against the row-by-row evaluation it replaces."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from main import TechnicalAnalysisContext, analyze_frame, analyze_series, analyze_signal_series
+
+STRATEGY_NAMES = [strategy.name for strategy in TechnicalAnalysisContext()._strategies]
+
+
+class FakeRequest:
+    """Just what the endpoints read from a starlette Request."""
+
+    def __init__(self, payload, query_params=None):
+        self._payload = payload
+        self.query_params = query_params or {}
+
+    async def json(self):
+        return self._payload
+
+
+def columns_payload(df):
+    return {"columns": {
+        "Date": df["Date"].astype("datetime64[s]").astype("int64").tolist(),
+        **{c: df[c].tolist() for c in ["Open", "High", "Low", "Close", "Volume"]},
+    }}
+
+
+@pytest.mark.parametrize("backend", ["ta", "numpy"])
+@pytest.mark.parametrize("index", range(len(STRATEGY_NAMES)), ids=STRATEGY_NAMES)
+def test_evaluate_series_matches_evaluate_on_every_bar(candles, backend, index):
+    context = TechnicalAnalysisContext(backend)
+    df = context.compute_indicators(candles(600, index)).dropna()
+    strategy = context._strategies[index]
+
+    expected = [strategy.evaluate(row) for _, row in df.iterrows()]
+    assert strategy.evaluate_series(df).tolist() == expected
+
+
+@pytest.mark.parametrize("backend", ["ta", "numpy"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_last_bar_matches_analyze_frame(candles, backend, seed):
+    df = candles(800, seed)
+    series = analyze_series(df.copy(), backend=backend)
+    last = analyze_frame(df.copy(), backend=backend)
+
+    assert series["overall_signal"][-1] == last["overall_signal"]
+    assert series["overall_score"][-1] == last["overall_score"]
+    assert {name: values[-1] for name, values in series["scores"].items()} == \
+        {signal["name"]: signal["score"] for signal in last["signals"]}
+
+
+def test_bars_limits_the_response_to_the_tail(candles):
+    df = candles(400, 3)
+    full = analyze_series(df.copy())
+    tail = asyncio.run(analyze_signal_series(FakeRequest(columns_payload(df), {"bars": "50"})))
+
+    assert tail["dates"] == full["dates"][-50:]
+    assert tail["overall_signal"] == full["overall_signal"][-50:]
+
+
+@pytest.mark.parametrize("bars", ["0", "-1", "abc", "1.5"])
+def test_invalid_bars_is_rejected(candles, bars):
+    request = FakeRequest(columns_payload(candles(300, 4)), {"bars": bars})
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(analyze_signal_series(request))
+    assert excinfo.value.status_code == 422